@@ -8,7 +8,7 @@ import streamlit as st
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 import warnings
 import math
 from scipy.stats import norm
@@ -17,6 +17,7 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import time
+from kiteconnect.exceptions import NetworkException
 warnings.filterwarnings('ignore')
 
 class NiftyFOStocksAnalyzer:
@@ -95,6 +96,21 @@ class NiftyFOStocksAnalyzer:
             "NIFTYIT": {"name": "Nifty IT", "symbol": "^CNXIT", "lot_size": 40},
             "NIFTYAUTO": {"name": "Nifty Auto", "symbol": "^CNXAUTO", "lot_size": 75}
         }
+        
+        # Ordered F&O symbols, built once for the screener entry points
+        self._symbols_tuple = tuple(self.fo_stocks)
+        
+        # NSE tradingsymbol -> instrument_token map, loaded once and shared by all fetches
+        self._instrument_tokens = None
+    
+    def _get_instrument_token(self, symbol: str):
+        """Look up the NSE instrument token, downloading the instrument dump only once."""
+        if self._instrument_tokens is None:
+            self._instrument_tokens = {
+                inst['tradingsymbol']: inst['instrument_token']
+                for inst in self.kite.instruments("NSE")
+            }
+        return self._instrument_tokens.get(symbol)
     
     def get_stock_data_kite(self, symbol: str, days: int = 30) -> pd.DataFrame:
         """Get historical stock data using Kite API."""
@@ -103,14 +119,7 @@ class NiftyFOStocksAnalyzer:
                 return pd.DataFrame()
             
             # Get instrument token
-            instruments = self.kite.instruments("NSE")
-            token = None
-            
-            for instrument in instruments:
-                if instrument['tradingsymbol'] == symbol:
-                    token = instrument['instrument_token']
-                    break
-            
+            token = self._get_instrument_token(symbol)
             if not token:
                 return pd.DataFrame()
             
@@ -118,12 +127,21 @@ class NiftyFOStocksAnalyzer:
             from_date = datetime.now() - timedelta(days=days)
             to_date = datetime.now()
             
-            historical_data = self.kite.historical_data(
-                instrument_token=token,
-                from_date=from_date,
-                to_date=to_date,
-                interval="day"
-            )
+            # Retry only transient network failures; bad symbols or empty
+            # responses will not succeed on a second attempt
+            historical_data = None
+            for attempt in range(2):
+                try:
+                    historical_data = self.kite.historical_data(
+                        instrument_token=token,
+                        from_date=from_date,
+                        to_date=to_date,
+                        interval="day"
+                    )
+                    break
+                except NetworkException:
+                    if attempt == 1:
+                        raise
             
             if historical_data:
                 df = pd.DataFrame(historical_data)
@@ -159,16 +177,25 @@ class NiftyFOStocksAnalyzer:
             if len(data) < window:
                 return 0.0
             
-            # Calculate daily returns
-            returns = data['Close'].pct_change().dropna()
+            closes = data['Close'].to_numpy(dtype=np.float64)[-(window + 1):]
+            
+            # Single-pass Welford variance of the last `window` daily log returns
+            mean = 0.0
+            m2 = 0.0
+            for k in range(1, len(closes)):
+                r = math.log(closes[k] / closes[k - 1])
+                delta = r - mean
+                mean += delta / k
+                m2 += delta * (r - mean)
             
-            # Calculate rolling volatility
-            volatility = returns.rolling(window=window).std().iloc[-1]
+            count = len(closes) - 1
+            if count < 2 or math.isnan(m2):
+                return 0.0
             
-            # Annualize (assuming 252 trading days)
-            annual_volatility = volatility * np.sqrt(252) * 100
+            # Annualize the sample variance (assuming 252 trading days)
+            annual_volatility = math.sqrt(m2 / (count - 1) * 252) * 100
             
-            return round(annual_volatility, 2) if not pd.isna(annual_volatility) else 0.0
+            return round(annual_volatility, 2)
         except:
             return 0.0
     
@@ -178,24 +205,29 @@ class NiftyFOStocksAnalyzer:
             if len(data) < period:
                 return 0.0
             
-            high_low = data['High'] - data['Low']
-            high_close = np.abs(data['High'] - data['Close'].shift())
-            low_close = np.abs(data['Low'] - data['Close'].shift())
+            high = data['High'].to_numpy(dtype=np.float64)
+            low = data['Low'].to_numpy(dtype=np.float64)
+            close = data['Close'].to_numpy(dtype=np.float64)
+            prev_close = np.empty_like(close)
+            prev_close[0] = np.nan
+            prev_close[1:] = close[:-1]
             
-            true_range = pd.concat([high_low, high_close, low_close], axis=1).max(axis=1)
-            atr = true_range.rolling(window=period).mean().iloc[-1]
+            # fmax skips the NaN previous close on the first bar, like DataFrame.max
+            true_range = np.fmax.reduce([high - low, np.abs(high - prev_close), np.abs(low - prev_close)])
+            atr = true_range[-period:].mean()
             
             return round(atr, 2) if not pd.isna(atr) else 0.0
         except:
             return 0.0
     
-    def analyze_fo_stock(self, symbol: str) -> Dict:
-        """Comprehensive F&O analysis for a single stock."""
+    def analyze_fo_stock(self, symbol: str, data: Optional[pd.DataFrame] = None) -> Dict:
+        """Comprehensive F&O analysis for a single stock (reuses ``data`` if already fetched)."""
         try:
             if symbol not in self.fo_stocks:
                 return {'status': 'error', 'error': 'Stock not in F&O list'}
             
-            data = self.get_fo_stock_data(symbol)
+            if data is None:
+                data = self.get_fo_stock_data(symbol)
             if data.empty:
                 return {'status': 'error', 'error': 'No data available'}
             
@@ -340,10 +372,10 @@ class NiftyFOStocksAnalyzer:
         """Alias for get_fo_overview for dashboard compatibility."""
         return self.get_fo_overview()
     
-    def get_fo_analytics(self, symbol: str) -> Dict:
+    def get_fo_analytics(self, symbol: str, data: Optional[pd.DataFrame] = None) -> Dict:
         """Get comprehensive F&O analytics for a single stock."""
         try:
-            result = self.analyze_fo_stock(symbol)
+            result = self.analyze_fo_stock(symbol, data)
             if result:
                 return {
                     'status': 'success',
@@ -377,7 +409,7 @@ class NiftyFOStocksAnalyzer:
         """Get top F&O stocks by volume activity."""
         results = []
         
-        for symbol in list(self.fo_stocks.keys())[:limit]:
+        for symbol in self._symbols_tuple[:limit]:
             try:
                 analytics = self.get_fo_analytics(symbol)
                 if analytics['status'] == 'success' and analytics['volume_ratio'] >= min_volume_ratio:
@@ -394,9 +426,14 @@ class NiftyFOStocksAnalyzer:
         """Get F&O stocks with high volatility."""
         results = []
         
-        for symbol in list(self.fo_stocks.keys())[:limit]:
+        for symbol in self._symbols_tuple[:limit]:
             try:
-                analytics = self.get_fo_analytics(symbol)
+                # Filter on volatility alone; only survivors get the full analysis
+                data = self.get_fo_stock_data(symbol)
+                if data.empty or self.calculate_historical_volatility(data) < min_volatility:
+                    continue
+                
+                analytics = self.get_fo_analytics(symbol, data)
                 if analytics['status'] == 'success' and analytics['historical_volatility'] >= min_volatility:
                     results.append(analytics)
             except Exception as e:
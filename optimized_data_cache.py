@@ -9,23 +9,152 @@ and intelligent cache management to speed up dashboard performance.
 import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
+import sys
 import threading
+from functools import partial
+from contextlib import contextmanager
 import time
-import warnings
-from concurrent.futures import ThreadPoolExecutor, as_completed
-import streamlit as st
+import heapq
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 
-warnings.filterwarnings('ignore')
+# Number of independently locked cache shards (must be a power of two)
+_CACHE_SHARDS = 16
+
+# Upper bound on cached entries across all shards (LRU-evicted beyond this)
+_MAX_CACHE_ENTRIES = 4096
+
+# How long past expiry an entry may still be served while it refreshes in the background
+_STALE_WINDOW_SECONDS = 60.0
+
+# Exchange suffixes tried in order when a symbol's suffix is not yet known
+_TICKER_SUFFIXES = (".NS", ".BO", "")
+
+class _RWLock:
+    """Minimal reader/writer lock: many concurrent readers or one writer."""
+    
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+    
+    def acquire_read(self):
+        with self._cond:
+            # Writers get priority so a steady stream of reads cannot starve them
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+    
+    def release_read(self):
+        with self._cond:
+            self._readers -= 1
+            if self._readers == 0:
+                self._cond.notify_all()
+    
+    def acquire_write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+    
+    def release_write(self):
+        with self._cond:
+            self._writer = False
+            self._cond.notify_all()
+    
+    @contextmanager
+    def read_lock(self):
+        self.acquire_read()
+        try:
+            yield
+        finally:
+            self.release_read()
+    
+    @contextmanager
+    def write_lock(self):
+        self.acquire_write()
+        try:
+            yield
+        finally:
+            self.release_write()
+
+class _CacheShard:
+    """One independently locked slice of the cache."""
+    
+    __slots__ = ('entries', 'lock', 'expiry_heap', 'stale_heap', 'fresh_count', 'last_sweep')
+    
+    def __init__(self):
+        # key -> (expiry, data), expiry in monotonic seconds, kept in LRU order (oldest first)
+        self.entries = OrderedDict()
+        self.lock = _RWLock()
+        # (expiry, key) for every write; items whose expiry no longer matches the entry are dead
+        self.expiry_heap = []
+        # Live entries already past expiry, waiting for the stale window to lapse
+        self.stale_heap = []
+        # Live entries whose expiry has not yet been swept off the heap
+        self.fresh_count = 0
+        self.last_sweep = float('-inf')
+    
+    def sweep(self, now: float):
+        """Pop heap items that have expired by ``now`` (caller holds the write lock)."""
+        heap = self.expiry_heap
+        while heap and heap[0][0] <= now:
+            expiry, key = heapq.heappop(heap)
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == expiry:
+                self.fresh_count -= 1
+                heapq.heappush(self.stale_heap, (expiry, key))
+        self.last_sweep = now
+    
+    def evict_stale(self, cutoff: float):
+        """Delete entries that expired at or before ``cutoff`` (caller holds the write lock)."""
+        heap = self.stale_heap
+        while heap and heap[0][0] <= cutoff:
+            expiry, key = heapq.heappop(heap)
+            entry = self.entries.get(key)
+            if entry is not None and entry[0] == expiry:
+                del self.entries[key]
+    
+    def forget(self, expiry: float):
+        """Account for a live entry leaving the shard (caller holds the write lock)."""
+        if expiry > self.last_sweep:
+            self.fresh_count -= 1
 
 class OptimizedDataCache:
     """High-performance data cache with concurrent fetching and intelligent caching."""
     
-    def __init__(self, cache_duration_minutes: int = 5):
+    def __init__(self, cache_duration_minutes: int = 5, max_entries: int = _MAX_CACHE_ENTRIES,
+                 max_workers: int = 16):
         self.cache_duration = timedelta(minutes=cache_duration_minutes)
-        self.cache = {}
-        self.cache_timestamps = {}
-        self.lock = threading.Lock()
+        self._cache_duration_s = cache_duration_minutes * 60.0
+        # Independently locked shards so unrelated keys never contend
+        self._shards = [_CacheShard() for _ in range(_CACHE_SHARDS)]
+        self._max_entries_per_shard = max(1, max_entries // _CACHE_SHARDS)
+        
+        # Long-lived fetch pool so threads stay warm between refreshes
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="cache")
+        
+        # Stale-while-revalidate: serve stale entries and refresh them off-thread
+        self._stale_window_s = _STALE_WINDOW_SECONDS
+        self._bg_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="cache-refresh")
+        self._refreshing = set()
+        self._refreshing_lock = threading.Lock()
+        
+        # Singleflight: one upstream fetch per key, concurrent misses wait on it
+        self._inflight: Dict[str, Future] = {}
+        self._inflight_lock = threading.Lock()
+        
+        # Interned cache keys, built once per (symbol, period)
+        self._stock_key_cache: Dict[Tuple[str, str], str] = {}
+        self._index_key_cache: Dict[str, str] = {}
+        
+        # Last ticker suffix that returned data for each symbol
+        self._suffix_map: Dict[str, str] = {}
+        self._suffix_lock = threading.Lock()
         
         # Pre-defined symbols for faster access
         self.index_symbols = {
@@ -38,6 +167,9 @@ class OptimizedDataCache:
             "Nifty Pharma": "^CNXPHARMA",
             "Nifty FMCG": "^CNXFMCG"
         }
+        # Aligned name/ticker tuples for iteration without dict lookups
+        self._index_names = tuple(self.index_symbols.keys())
+        self._index_tickers = tuple(self.index_symbols.values())
         
         # Common F&O stocks for faster access
         self.fo_stocks = [
@@ -47,73 +179,176 @@ class OptimizedDataCache:
             "NTPC", "ONGC", "POWERGRID", "M&M", "TATAMOTORS", "TATASTEEL"
         ]
     
-    def _is_cache_valid(self, key: str) -> bool:
-        """Check if cached data is still valid."""
-        if key not in self.cache_timestamps:
-            return False
-        return datetime.now() - self.cache_timestamps[key] < self.cache_duration
-    
-    def _get_from_cache(self, key: str) -> Optional[Dict]:
-        """Get data from cache if valid."""
-        with self.lock:
-            if self._is_cache_valid(key):
-                return self.cache.get(key)
+    def _stock_key(self, symbol: str, period: str) -> str:
+        """Cache key for a stock, formatted and interned only on first use."""
+        key = self._stock_key_cache.get((symbol, period))
+        if key is None:
+            key = sys.intern(f"stock_{symbol}_{period}")
+            self._stock_key_cache[(symbol, period)] = key
+        return key
+    
+    def _index_key(self, symbol: str) -> str:
+        """Cache key for an index, formatted and interned only on first use."""
+        key = self._index_key_cache.get(symbol)
+        if key is None:
+            key = sys.intern(f"index_{symbol}")
+            self._index_key_cache[symbol] = key
+        return key
+    
+    def _shard(self, key: str) -> _CacheShard:
+        """Return the shard owning a key."""
+        return self._shards[hash(key) & (_CACHE_SHARDS - 1)]
+    
+    def _get_from_cache(self, key: str, refresh: Optional[Callable[[], Dict]] = None) -> Optional[Dict]:
+        """
+        Get data from cache if valid.
+        If the entry expired less than the stale window ago and a ``refresh``
+        callable is given, return the stale data and refresh it in the background.
+        """
+        shard = self._shard(key)
+        now = time.monotonic()
+        with shard.lock.read_lock():
+            entry = shard.entries.get(key)
+            if not entry:
+                return None
+            expiry, data = entry
+            if expiry > now:
+                # OrderedDict.move_to_end is a single C call under the GIL, so
+                # concurrent readers may reorder safely; writers are excluded
+                shard.entries.move_to_end(key)
+                return data
+        
+        if refresh is not None and now < expiry + self._stale_window_s:
+            self._refresh_in_background(key, refresh)
+            return data
         return None
     
+    def _refresh_in_background(self, key: str, refresh: Callable[[], Dict]):
+        """Schedule at most one background refresh per key."""
+        with self._refreshing_lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+        
+        def run():
+            try:
+                refresh()
+            finally:
+                with self._refreshing_lock:
+                    self._refreshing.discard(key)
+        
+        self._bg_pool.submit(run)
+    
     def _set_cache(self, key: str, data: Dict):
-        """Set data in cache with timestamp."""
-        with self.lock:
-            self.cache[key] = data
-            self.cache_timestamps[key] = datetime.now()
+        """Set data in cache with its expiry time."""
+        shard = self._shard(key)
+        expiry = time.monotonic() + self._cache_duration_s
+        with shard.lock.write_lock():
+            previous = shard.entries.get(key)
+            if previous is not None:
+                shard.forget(previous[0])
+            
+            shard.entries[key] = (expiry, data)
+            shard.entries.move_to_end(key)
+            heapq.heappush(shard.expiry_heap, (expiry, key))
+            shard.fresh_count += 1
+            
+            while len(shard.entries) > self._max_entries_per_shard:
+                _, (evicted_expiry, _) = shard.entries.popitem(last=False)
+                shard.forget(evicted_expiry)
+    
+    def _singleflight(self, key: str, fetch: Callable[[], Dict]) -> Dict:
+        """Run ``fetch`` once per key; concurrent callers for the same key share its result."""
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            is_leader = future is None
+            if is_leader:
+                future = Future()
+                self._inflight[key] = future
+        
+        if not is_leader:
+            return future.result()
+        
+        try:
+            result = fetch()
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+    
+    def _build_stock_result(self, symbol: str, data: pd.DataFrame) -> Dict:
+        """Build the cached stock result dict from a daily OHLCV frame."""
+        # Keep only the last few closes/volumes; the full frame is never reused
+        closes = data['Close'].to_numpy(dtype=np.float32)[-5:]
+        volumes = data['Volume'].to_numpy(dtype=np.int64)[-5:]
+        
+        current_price = float(closes[-1])
+        volume = int(volumes[-1])
+        
+        # Calculate change
+        if len(closes) >= 2:
+            previous_close = float(closes[-2])
+            change = current_price - previous_close
+            change_pct = (change / previous_close) * 100
+        else:
+            change = 0
+            change_pct = 0
+        
+        return {
+            'symbol': symbol,
+            'price': current_price,
+            'volume': volume,
+            'change': change,
+            'change_pct': change_pct,
+            'close_hist': closes,
+            'volume_hist': volumes,
+            'status': 'success',
+            'timestamp': datetime.now()
+        }
     
     def fetch_single_stock_data(self, symbol: str, period: str = "5d") -> Dict:
         """Fetch single stock data with caching."""
-        cache_key = f"stock_{symbol}_{period}"
+        cache_key = self._stock_key(symbol, period)
         
         # Try cache first
-        cached_data = self._get_from_cache(cache_key)
+        cached_data = self._get_from_cache(cache_key, partial(self._fetch_stock_uncached, symbol, period))
         if cached_data:
             return cached_data
         
+        return self._singleflight(cache_key, partial(self._fetch_stock_uncached, symbol, period))
+    
+    def _fetch_stock_uncached(self, symbol: str, period: str = "5d") -> Dict:
+        """Fetch single stock data from upstream and store it in the cache."""
+        cache_key = self._stock_key(symbol, period)
+        
         # Fetch fresh data
         try:
-            # Try different ticker formats
-            for suffix in [".NS", ".BO", ""]:
-                try:
-                    ticker_symbol = f"{symbol}{suffix}" if suffix else symbol
-                    ticker = yf.Ticker(ticker_symbol)
-                    data = ticker.history(period=period, interval="1d")
-                    
-                    if not data.empty and len(data) >= 1:
-                        current_price = float(data['Close'].iloc[-1])
-                        volume = int(data['Volume'].iloc[-1]) if len(data) >= 1 else 0
-                        
-                        # Calculate change
-                        if len(data) >= 2:
-                            previous_close = float(data['Close'].iloc[-2])
-                            change = current_price - previous_close
-                            change_pct = (change / previous_close) * 100
-                        else:
-                            change = 0
-                            change_pct = 0
-                        
-                        result = {
-                            'symbol': symbol,
-                            'price': current_price,
-                            'volume': volume,
-                            'change': change,
-                            'change_pct': change_pct,
-                            'data': data,
-                            'status': 'success',
-                            'timestamp': datetime.now()
-                        }
-                        
-                        # Cache the result
-                        self._set_cache(cache_key, result)
-                        return result
-                        
-                except Exception:
+            # Try the last working suffix first, then the remaining formats
+            known_suffix = self._suffix_map.get(symbol, ".NS")
+            suffixes = (known_suffix,) + tuple(sfx for sfx in _TICKER_SUFFIXES if sfx != known_suffix)
+            
+            for suffix in suffixes:
+                ticker_symbol = f"{symbol}{suffix}" if suffix else symbol
+                ticker = yf.Ticker(ticker_symbol)
+                data = ticker.history(period=period, interval="1d")
+                
+                # An unknown ticker comes back empty rather than raising
+                if data.empty:
                     continue
+                
+                result = self._build_stock_result(symbol, data)
+                
+                if suffix != known_suffix:
+                    with self._suffix_lock:
+                        self._suffix_map[symbol] = suffix
+                
+                # Cache the result
+                self._set_cache(cache_key, result)
+                return result
             
             # If all formats failed
             return {'status': 'error', 'message': f'No data found for {symbol}'}
@@ -121,153 +356,156 @@ class OptimizedDataCache:
         except Exception as e:
             return {'status': 'error', 'message': str(e)}
     
-    def fetch_multiple_stocks_concurrent(self, symbols: List[str], max_workers: int = 10) -> Dict[str, Dict]:
-        """Fetch multiple stocks concurrently for better performance."""
+    def fetch_multiple_stocks_concurrent(self, symbols: List[str], max_workers: Optional[int] = None) -> Dict[str, Dict]:
+        """
+        Fetch multiple stocks concurrently for better performance.
+        ``max_workers`` is accepted for compatibility but ignored: fetches run on the
+        shared pool, whose size is set in the constructor.
+        """
         results = {}
         
         # Check cache first
         uncached_symbols = []
         for symbol in symbols:
-            cached = self._get_from_cache(f"stock_{symbol}_5d")
+            cached = self._get_from_cache(self._stock_key(symbol, "5d"), partial(self._fetch_stock_uncached, symbol))
             if cached:
                 results[symbol] = cached
             else:
                 uncached_symbols.append(symbol)
         
-        # Fetch uncached symbols concurrently
+        # Fetch uncached symbols concurrently on the shared pool
         if uncached_symbols:
-            with ThreadPoolExecutor(max_workers=max_workers) as executor:
-                future_to_symbol = {
-                    executor.submit(self.fetch_single_stock_data, symbol): symbol 
-                    for symbol in uncached_symbols
-                }
-                
-                for future in as_completed(future_to_symbol):
-                    symbol = future_to_symbol[future]
-                    try:
-                        result = future.result(timeout=10)  # 10 second timeout per stock
-                        results[symbol] = result
-                    except Exception as e:
-                        results[symbol] = {'status': 'error', 'message': str(e)}
+            futures = [(symbol, self._pool.submit(self.fetch_single_stock_data, symbol))
+                       for symbol in uncached_symbols]
+            for symbol, future in futures:
+                try:
+                    results[symbol] = future.result(timeout=10)  # 10 second timeout per stock
+                except Exception as e:
+                    results[symbol] = {'status': 'error', 'message': str(e)}
         
         return results
     
     def fetch_index_data(self, symbol: str) -> Dict:
         """Fetch index data with caching and error handling."""
-        cache_key = f"index_{symbol}"
+        cache_key = self._index_key(symbol)
         
         # Try cache first
-        cached_data = self._get_from_cache(cache_key)
+        cached_data = self._get_from_cache(cache_key, partial(self._fetch_index_uncached, symbol))
         if cached_data:
             return cached_data
         
+        return self._singleflight(cache_key, partial(self._fetch_index_uncached, symbol))
+    
+    def _fetch_index_uncached(self, symbol: str) -> Dict:
+        """Fetch index data from upstream and store it in the cache."""
+        cache_key = self._index_key(symbol)
+        
         try:
             ticker = yf.Ticker(symbol)
             data = ticker.history(period="5d", interval="1d")
             
-            if not data.empty and len(data) >= 2:
-                current_price = float(data['Close'].iloc[-1])
-                previous_close = float(data['Close'].iloc[-2])
-                
-                change = current_price - previous_close
-                change_pct = (change / previous_close) * 100
-                
-                result = {
-                    'price': current_price,
-                    'change': change,
-                    'change_percent': change_pct,
-                    'previous_close': previous_close,
-                    'status': 'success',
-                    'timestamp': datetime.now()
-                }
-                
-                # Cache the result
-                self._set_cache(cache_key, result)
-                return result
+            if data.empty:
+                return {'status': 'error', 'message': 'No data available'}
             
-            elif not data.empty:
-                # Fallback with single day data
-                current_price = float(data['Close'].iloc[-1])
-                open_price = float(data['Open'].iloc[-1])
-                
-                change = current_price - open_price
-                change_pct = (change / open_price) * 100 if open_price != 0 else 0
-                
-                result = {
-                    'price': current_price,
-                    'change': change,
-                    'change_percent': change_pct,
-                    'previous_close': open_price,
-                    'status': 'success',
-                    'timestamp': datetime.now()
-                }
-                
-                self._set_cache(cache_key, result)
-                return result
+            result = self._build_index_result(data)
             
-            else:
-                return {'status': 'error', 'message': 'No data available'}
+            # Cache the result
+            self._set_cache(cache_key, result)
+            return result
                 
         except Exception as e:
             return {'status': 'error', 'message': str(e)}
     
+    def _build_index_result(self, data: pd.DataFrame) -> Dict:
+        """Build the cached index result dict from a non-empty daily OHLC frame."""
+        current_price = float(data['Close'].iloc[-1])
+        
+        if len(data) >= 2:
+            previous_close = float(data['Close'].iloc[-2])
+            change = current_price - previous_close
+            change_pct = (change / previous_close) * 100
+        else:
+            # Fallback with single day data
+            previous_close = float(data['Open'].iloc[-1])
+            change = current_price - previous_close
+            change_pct = (change / previous_close) * 100 if previous_close != 0 else 0
+        
+        return {
+            'price': current_price,
+            'change': change,
+            'change_percent': change_pct,
+            'previous_close': previous_close,
+            'status': 'success',
+            'timestamp': datetime.now()
+        }
+    
     def fetch_all_indices_concurrent(self) -> Dict[str, Dict]:
-        """Fetch all indices concurrently for better performance."""
+        """Fetch all indices concurrently, serving cached ones without a request."""
         results = {}
         
-        with ThreadPoolExecutor(max_workers=8) as executor:
-            future_to_index = {
-                executor.submit(self.fetch_index_data, symbol): name 
-                for name, symbol in self.index_symbols.items()
-            }
-            
-            for future in as_completed(future_to_index):
-                index_name = future_to_index[future]
+        # Check cache first
+        uncached = []
+        for name, symbol in zip(self._index_names, self._index_tickers):
+            cached = self._get_from_cache(self._index_key(symbol), partial(self._fetch_index_uncached, symbol))
+            if cached:
+                results[name] = cached
+            else:
+                uncached.append((name, symbol))
+        
+        # Fetch uncached indices concurrently on the shared pool
+        if uncached:
+            futures = [(name, self._pool.submit(self.fetch_index_data, symbol)) for name, symbol in uncached]
+            for name, future in futures:
                 try:
-                    result = future.result(timeout=5)  # 5 second timeout per index
-                    results[index_name] = result
+                    results[name] = future.result(timeout=5)  # 5 second timeout per index
                 except Exception as e:
-                    results[index_name] = {'status': 'error', 'message': str(e)}
+                    results[name] = {'status': 'error', 'message': str(e)}
         
-        return results
+        return {name: results[name] for name in self._index_names}
     
     def get_cache_stats(self) -> Dict:
         """Get cache statistics for monitoring."""
-        with self.lock:
-            total_items = len(self.cache)
-            valid_items = sum(1 for key in self.cache.keys() if self._is_cache_valid(key))
-            
-            return {
-                'total_cached_items': total_items,
-                'valid_cached_items': valid_items,
-                'cache_hit_rate': f"{(valid_items/total_items)*100:.1f}%" if total_items > 0 else "0%",
-                'cache_duration_minutes': self.cache_duration.total_seconds() / 60
-            }
+        total_items = 0
+        valid_items = 0
+        current_time = time.monotonic()
+        for shard in self._shards:
+            # Sweeping only pops what expired since the last call, so this stays cheap
+            with shard.lock.write_lock():
+                shard.sweep(current_time)
+                total_items += len(shard.entries)
+                valid_items += shard.fresh_count
+        
+        return {
+            'total_cached_items': total_items,
+            'valid_cached_items': valid_items,
+            'cache_hit_rate': f"{(valid_items/total_items)*100:.1f}%" if total_items > 0 else "0%",
+            'cache_duration_minutes': self.cache_duration.total_seconds() / 60
+        }
     
     def clear_cache(self):
-        """Clear all cached data."""
-        with self.lock:
-            self.cache.clear()
-            self.cache_timestamps.clear()
+        """Clear all cached data (the learned suffix map is kept)."""
+        for shard in self._shards:
+            with shard.lock.write_lock():
+                shard.entries.clear()
+                shard.expiry_heap.clear()
+                shard.stale_heap.clear()
+                shard.fresh_count = 0
     
     def clear_expired_cache(self):
         """Clear only expired cache entries."""
-        with self.lock:
-            current_time = datetime.now()
-            expired_keys = [
-                key for key, timestamp in self.cache_timestamps.items()
-                if current_time - timestamp >= self.cache_duration
-            ]
-            
-            for key in expired_keys:
-                self.cache.pop(key, None)
-                self.cache_timestamps.pop(key, None)
+        current_time = time.monotonic()
+        for shard in self._shards:
+            with shard.lock.write_lock():
+                shard.sweep(current_time)
+                # Entries inside the stale window are still servable, so keep them
+                shard.evict_stale(current_time - self._stale_window_s)
+
+# Global cache instance (module import happens once per process, so this is a singleton)
+_DATA_CACHE = OptimizedDataCache(cache_duration_minutes=3)  # 3-minute cache
 
-# Global cache instance
-@st.cache_resource
 def get_data_cache():
-    """Get or create global data cache instance."""
-    return OptimizedDataCache(cache_duration_minutes=3)  # 3-minute cache
+    """Get the global data cache instance."""
+    return _DATA_CACHE
 
 # Convenience functions for easy integration
 def get_indices_data_fast() -> Dict[str, Dict]:
@@ -13,19 +13,135 @@ Created: 2025-01-27
 """
 
 import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 import pandas as pd
 import numpy as np
+import time
 from datetime import datetime, date, timedelta
-from typing import Dict, List, Optional
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
 import warnings
 warnings.filterwarnings('ignore')
 
 # Import our technical analysis engine
-from premarket_technical_analysis_engine import analyze_stock_for_premarket, PreMarketTechnicalAnalysisEngine
-from premarket_high_volume_analyzer import PreMarketHighVolumeAnalyzer
+from premarket_technical_analysis_engine import analyze_stock_for_premarket, clear_ohlcv_cache, PreMarketTechnicalAnalysisEngine
+from premarket_high_volume_analyzer import PreMarketHighVolumeAnalyzer, format_volume, format_volume_column, kite_session_key
 from premarket_config import PreMarketConfig, PREMARKET_DISPLAY_CONFIG
+from technical_indicator_kernels import bollinger_bands, wilder_rsi
+
+# Trading decision presentation: (emoji, background colour), risk by confidence, and follow-up guidance
+DECISION_STYLES = {
+    'BUY': ('🟢', '#d4edda'),
+    'SELL': ('🔴', '#f8d7da'),
+    'HOLD': ('🟡', '#fff3cd')
+}
+RISK_LEVELS = {'High': "Low to Medium", 'Medium': "Medium"}
+DECISION_GUIDANCE = {
+    'BUY': ("**Recommended Time Horizon:** Short to Medium term (1-4 weeks)",
+            "**Entry Strategy:** Consider gradual accumulation on dips"),
+    'SELL': ("**Recommended Time Horizon:** Immediate to Short term",
+             "**Exit Strategy:** Consider partial profit booking"),
+    'HOLD': ("**Recommended Action:** Wait for clearer signals",
+             "**Monitoring:** Watch for breakout or breakdown patterns")
+}
+
+# Minimum seconds between progress widget updates while a batch analysis runs
+PROGRESS_UPDATE_INTERVAL = 0.25
+
+# Flat per-symbol result columns (see _flatten_results) and their summary table labels
+FLAT_RESULT_COLUMNS = {
+    'symbol': 'Symbol',
+    'close': 'Price (₹)',
+    'high': 'High (₹)',
+    'low': 'Low (₹)',
+    'volume': 'Volume',
+    'daily_rsi': 'Daily RSI',
+    'daily_adx': 'Daily ADX',
+    'daily_kst': 'KST',
+    'rs': 'Rel. Strength',
+    'rs_rank': 'RS Rank',
+    'outperformance': 'vs Benchmark',
+    'decision': 'Decision',
+    'confidence': 'Confidence',
+    'score': 'Score',
+    'tradingview_link': 'TradingView'
+}
+
+# Display formats for numeric table columns; the underlying frames keep raw floats
+INDICATOR_TABLE_FORMATS = {'RSI': '{:.1f}', 'ADX': '{:.1f}', 'MACD': '{:.4f}', 'Signal': '{:.4f}'}
+SUMMARY_TABLE_FORMATS = {
+    'Price (₹)': '%.2f',
+    'High (₹)': '%.2f',
+    'Low (₹)': '%.2f',
+    'Daily RSI': '%.1f',
+    'Daily ADX': '%.1f',
+    'KST': '%.1f',
+    'Rel. Strength': '%.1f%%',
+    'RS Rank': '%.0f'
+}
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _get_premarket_analyzer(kite_key: str, _kite=None) -> PreMarketHighVolumeAnalyzer:
+    """Shared high volume analyzer per kite session; ``kite_key`` is kite_session_key(kite) since the client itself isn't hashable."""
+    return PreMarketHighVolumeAnalyzer(_kite)
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _get_tech_engine(kite_key: str, _kite=None) -> PreMarketTechnicalAnalysisEngine:
+    """Shared technical analysis engine per kite session."""
+    return PreMarketTechnicalAnalysisEngine(_kite)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_analyze(symbol: str, analysis_date: date, benchmark_symbol: str, rs_period: int,
+                    _kite=None, _benchmark_series: Optional[pd.Series] = None) -> Dict:
+    """
+    Memoized analyze_stock_for_premarket so UI toggles don't re-run the analysis.
+    The kite client and the prefetched benchmark are underscore-prefixed so Streamlit
+    leaves them out of the cache key (the benchmark is already keyed by symbol and period).
+    The trading decision is left to _score_results so a batch is scored in one pass.
+    """
+    return analyze_stock_for_premarket(symbol, _kite, benchmark_symbol, rs_period, _benchmark_series,
+                                       include_decision=False)
+
+def _score_results(results: List[Dict], tech_engine: PreMarketTechnicalAnalysisEngine):
+    """Add a trading decision to each result that lacks one, scoring them all in one batch."""
+    pending = [result for result in results if 'decision' not in result]
+    if pending:
+        decisions = tech_engine.generate_trading_decisions_batch([result['analysis'] for result in pending])
+        for result, decision in zip(pending, decisions):
+            result['decision'] = decision
+
+@st.cache_data(ttl=600, show_spinner=False)
+def _cached_benchmark(benchmark_symbol: str, rs_period: int, _tech_engine: PreMarketTechnicalAnalysisEngine) -> pd.Series:
+    """
+    Benchmark closes shared by every stock in a batch analysis. A failed fetch raises
+    ValueError, so Streamlit does not memoize the failure for the whole TTL.
+    """
+    closes = _tech_engine.get_benchmark_close(benchmark_symbol, rs_period)
+    if closes.empty:
+        raise ValueError(f"No benchmark data for {benchmark_symbol}")
+    return closes
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _cached_high_volume(analysis_date: date, has_kite: bool, _premarket_analyzer: PreMarketHighVolumeAnalyzer) -> pd.DataFrame:
+    """
+    Memoized high volume universe for a date. ``has_kite`` is part of the key so a
+    result fetched before login is not served once a kite session exists.
+    """
+    return _premarket_analyzer.get_premarket_high_volume_stocks(analysis_date)
+
+@st.cache_data(ttl=900, show_spinner=False)
+def _cached_chart_frame(symbol: str, _tech_engine: PreMarketTechnicalAnalysisEngine) -> pd.DataFrame:
+    """3-month daily OHLCV with Bollinger Band and RSI columns precomputed for charting."""
+    data = _tech_engine.get_ohlcv_data(symbol, period="3mo", interval="1d")
+    if data.empty:
+        return data
+    
+    data = data.copy()
+    close = data['Close'].to_numpy(dtype=np.float64)
+    data['bb_upper'], data['bb_mid'], data['bb_lower'] = bollinger_bands(close, 20)
+    data['rsi'] = wilder_rsi(close, 14)
+    
+    return data
 
 def display_technical_analysis_dashboard(kite=None):
     """
@@ -34,9 +150,10 @@ def display_technical_analysis_dashboard(kite=None):
     st.header("🔬 Advanced Pre-Market Technical Analysis")
     st.markdown("*Comprehensive technical analysis with automated trading recommendations*")
     
-    # Initialize analyzers
-    premarket_analyzer = PreMarketHighVolumeAnalyzer(kite)
-    tech_engine = PreMarketTechnicalAnalysisEngine(kite)
+    # Reuse analyzers across reruns
+    session_key = kite_session_key(kite)
+    premarket_analyzer = _get_premarket_analyzer(session_key, kite)
+    tech_engine = _get_tech_engine(session_key, kite)
     
     # Sidebar controls
     with st.sidebar:
@@ -99,40 +216,59 @@ def display_technical_analysis_dashboard(kite=None):
             help="Number of days for relative strength calculation"
         )
         
-        # Refresh button
+        max_workers = st.number_input(
+            "Parallel Analyses",
+            min_value=1,
+            max_value=16,
+            value=8,
+            step=1,
+            help="Number of stocks analyzed concurrently (lower this if you hit API rate limits)"
+        )
+        
+        # Refresh button: drop memoized results and the shared OHLCV cache so data is refetched
         if st.button("🔄 Refresh Analysis", type="primary"):
+            _cached_analyze.clear()
+            _cached_benchmark.clear()
+            clear_ohlcv_cache()
             st.rerun()
     
     # Main content area
     if stock_selection == "Single Stock Analysis" and 'single_stock' in locals() and single_stock:
         # Single stock detailed analysis
-        display_single_stock_analysis(single_stock.upper(), tech_engine, show_ohlcv, show_indicators, show_decisions, show_charts, benchmark_symbol, rs_period)
+        display_single_stock_analysis(single_stock.upper(), tech_engine, analysis_date, show_ohlcv, show_indicators, show_decisions, show_charts, benchmark_symbol, rs_period)
     
     elif stock_selection == "Custom Stock List" and 'custom_stocks' in locals() and custom_stocks:
         # Custom stock list analysis
         stock_list = [s.strip().upper() for s in custom_stocks.split(',') if s.strip()]
-        display_multi_stock_analysis(stock_list, tech_engine, show_ohlcv, show_indicators, show_decisions, benchmark_symbol, rs_period)
+        display_multi_stock_analysis(stock_list, tech_engine, analysis_date, show_ohlcv, show_indicators, show_decisions, benchmark_symbol, rs_period, max_workers)
     
     else:
         # High volume stocks analysis (default)
-        display_high_volume_technical_analysis(premarket_analyzer, tech_engine, analysis_date, show_ohlcv, show_indicators, show_decisions, benchmark_symbol, rs_period)
+        display_high_volume_technical_analysis(premarket_analyzer, tech_engine, analysis_date, show_ohlcv, show_indicators, show_decisions, benchmark_symbol, rs_period, max_workers)
 
-def display_single_stock_analysis(symbol: str, tech_engine: PreMarketTechnicalAnalysisEngine, 
+def display_single_stock_analysis(symbol: str, tech_engine: PreMarketTechnicalAnalysisEngine, analysis_date: date,
                                 show_ohlcv: bool, show_indicators: bool, show_decisions: bool, show_charts: bool,
                                 benchmark_symbol: str = "^NSEI", rs_period: int = 55):
     """Display detailed technical analysis for a single stock."""
     
     st.subheader(f"📈 Detailed Analysis: {symbol}")
     
+    if st.button("♻️ Force refresh", help="Discard cached analysis results and fetch fresh data"):
+        _cached_analyze.clear()
+        _cached_benchmark.clear()
+        clear_ohlcv_cache()
+    
     with st.spinner(f"Analyzing {symbol}..."):
         try:
             # Get comprehensive analysis
-            analysis_result = analyze_stock_for_premarket(symbol, tech_engine.kite, benchmark_symbol, rs_period)
+            analysis_result = _cached_analyze(symbol, analysis_date, benchmark_symbol, rs_period, _kite=tech_engine.kite)
             
             if 'error' in analysis_result:
                 st.error(f"Error analyzing {symbol}: {analysis_result['error']}")
                 return
             
+            _score_results([analysis_result], tech_engine)
+            
             # Display TradingView link
             st.markdown(f"**📊 [View on TradingView]({analysis_result['tradingview_link']})**")
             
@@ -157,40 +293,90 @@ def display_single_stock_analysis(symbol: str, tech_engine: PreMarketTechnicalAn
         except Exception as e:
             st.error(f"Error analyzing {symbol}: {str(e)}")
 
-def display_multi_stock_analysis(stock_list: List[str], tech_engine: PreMarketTechnicalAnalysisEngine,
-                                show_ohlcv: bool, show_indicators: bool, show_decisions: bool,
-                                benchmark_symbol: str = "^NSEI", rs_period: int = 55):
-    """Display technical analysis for multiple stocks."""
-    
-    st.subheader(f"📊 Multi-Stock Analysis ({len(stock_list)} stocks)")
-    
-    # Progress bar
+def analyze_stocks_parallel(stock_list: List[str], tech_engine: PreMarketTechnicalAnalysisEngine,
+                            analysis_date: date, benchmark_symbol: str, rs_period: int, max_workers: int = 8,
+                            display_flags: Optional[Tuple[bool, bool, bool]] = None) -> List[Dict]:
+    """
+    Analyze several stocks concurrently, updating a progress bar as each one completes.
+    When ``display_flags`` (show_ohlcv, show_indicators, show_decisions) is given, a preview
+    of the summary table is streamed as results arrive. Results are returned in the order
+    of ``stock_list``.
+    """
     progress_bar = st.progress(0)
     status_text = st.empty()
+    table_slot = st.empty()
     
-    results = []
+    # Fetch the benchmark once for the whole batch; fall back to per-stock fetches if it failed
+    try:
+        benchmark_series = _cached_benchmark(benchmark_symbol, rs_period, tech_engine)
+    except ValueError:
+        benchmark_series = None
     
-    for i, symbol in enumerate(stock_list):
-        status_text.text(f"Analyzing {symbol}... ({i+1}/{len(stock_list)})")
-        progress_bar.progress((i + 1) / len(stock_list))
-        
+    def analyze_one(symbol: str) -> Tuple[Optional[Dict], Optional[str]]:
+        # Runs in a worker thread, so errors are returned rather than rendered here
         try:
-            analysis_result = analyze_stock_for_premarket(symbol, tech_engine.kite, benchmark_symbol, rs_period)
-            results.append(analysis_result)
+            return _cached_analyze(symbol, analysis_date, benchmark_symbol, rs_period,
+                                   _kite=tech_engine.kite, _benchmark_series=benchmark_series), None
         except Exception as e:
-            st.warning(f"Error analyzing {symbol}: {str(e)}")
+            return None, str(e)
+    
+    results_by_symbol = {}
+    last_update = 0.0
+    # Workers call st.cache_data functions, so give each thread this script run's context
+    with ThreadPoolExecutor(max_workers=max_workers, initializer=add_script_run_ctx,
+                            initargs=(None, get_script_run_ctx())) as executor:
+        futures = {executor.submit(analyze_one, symbol): symbol for symbol in stock_list}
+        
+        for done, future in enumerate(as_completed(futures), start=1):
+            symbol = futures[future]
+            analysis_result, error = future.result()
+            
+            if error is not None:
+                st.warning(f"Error analyzing {symbol}: {error}")
+            else:
+                results_by_symbol[symbol] = analysis_result
+            
+            # Each widget update is a websocket message, so throttle them
+            now = time.monotonic()
+            if now - last_update >= PROGRESS_UPDATE_INTERVAL or done == len(futures):
+                status_text.text(f"Analyzed {symbol}... ({done}/{len(futures)})")
+                progress_bar.progress(done / len(futures))
+                last_update = now
+                
+                if display_flags is not None and results_by_symbol:
+                    partial_results = [results_by_symbol[s] for s in stock_list if s in results_by_symbol]
+                    _score_results(partial_results, tech_engine)
+                    preview = _build_summary_frame(_flatten_results(partial_results, *display_flags), *display_flags)
+                    table_slot.dataframe(preview, use_container_width=True, column_config=_summary_column_config(preview))
     
     status_text.text("Analysis complete!")
     progress_bar.empty()
+    # The caller renders the full, styled table
+    table_slot.empty()
+    
+    results = [results_by_symbol[symbol] for symbol in stock_list if symbol in results_by_symbol]
+    _score_results(results, tech_engine)
+    return results
+
+def display_multi_stock_analysis(stock_list: List[str], tech_engine: PreMarketTechnicalAnalysisEngine,
+                                analysis_date: date, show_ohlcv: bool, show_indicators: bool, show_decisions: bool,
+                                benchmark_symbol: str = "^NSEI", rs_period: int = 55, max_workers: int = 8):
+    """Display technical analysis for multiple stocks."""
+    
+    st.subheader(f"📊 Multi-Stock Analysis ({len(stock_list)} stocks)")
+    
+    results = analyze_stocks_parallel(stock_list, tech_engine, analysis_date, benchmark_symbol, rs_period, max_workers,
+                                      (show_ohlcv, show_indicators, show_decisions))
     
     # Display results
-    display_analysis_summary_table(results, show_ohlcv, show_indicators, show_decisions)
+    display_analysis_summary_table(_cached_flat_results(_results_key(results), results), show_ohlcv, show_indicators, show_decisions)
 
 def display_high_volume_technical_analysis(premarket_analyzer: PreMarketHighVolumeAnalyzer, 
                                          tech_engine: PreMarketTechnicalAnalysisEngine,
                                          analysis_date: date, show_ohlcv: bool, 
                                          show_indicators: bool, show_decisions: bool,
-                                         benchmark_symbol: str = "^NSEI", rs_period: int = 55):
+                                         benchmark_symbol: str = "^NSEI", rs_period: int = 55,
+                                         max_workers: int = 8):
     """Display technical analysis for high volume stocks."""
     
     st.subheader("🔥 High Volume Stocks - Technical Analysis")
@@ -198,7 +384,7 @@ def display_high_volume_technical_analysis(premarket_analyzer: PreMarketHighVolu
     with st.spinner("Fetching high volume stocks and analyzing..."):
         try:
             # Get high volume stocks
-            high_volume_data = premarket_analyzer.get_premarket_high_volume_stocks(analysis_date)
+            high_volume_data = _cached_high_volume(analysis_date, premarket_analyzer.kite is not None, premarket_analyzer)
             
             if high_volume_data.empty:
                 st.warning("No high volume stocks found for the selected date.")
@@ -209,26 +395,12 @@ def display_high_volume_technical_analysis(premarket_analyzer: PreMarketHighVolu
             
             st.info(f"Analyzing top {len(top_stocks)} high volume stocks from {analysis_date}")
             
-            # Analyze each stock
-            results = []
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            for i, symbol in enumerate(top_stocks):
-                status_text.text(f"Analyzing {symbol}... ({i+1}/{len(top_stocks)})")
-                progress_bar.progress((i + 1) / len(top_stocks))
-                
-                try:
-                    analysis_result = analyze_stock_for_premarket(symbol, tech_engine.kite, benchmark_symbol, rs_period)
-                    results.append(analysis_result)
-                except Exception as e:
-                    st.warning(f"Error analyzing {symbol}: {str(e)}")
-            
-            status_text.text("Analysis complete!")
-            progress_bar.empty()
+            # Analyze all stocks concurrently
+            results = analyze_stocks_parallel(top_stocks, tech_engine, analysis_date, benchmark_symbol, rs_period, max_workers,
+                                              (show_ohlcv, show_indicators, show_decisions))
             
             # Display results
-            display_analysis_summary_table(results, show_ohlcv, show_indicators, show_decisions)
+            display_analysis_summary_table(_cached_flat_results(_results_key(results), results), show_ohlcv, show_indicators, show_decisions)
             
         except Exception as e:
             st.error(f"Error in high volume analysis: {str(e)}")
@@ -280,25 +452,21 @@ def display_technical_indicators(analysis_result: Dict):
             
             row = {
                 'Timeframe': tf.upper(),
-                'RSI': f"{indicators.get('rsi', 'N/A'):.1f}" if not pd.isna(indicators.get('rsi', np.nan)) else 'N/A',
-                'ADX': f"{indicators.get('adx', 'N/A'):.1f}" if not pd.isna(indicators.get('adx', np.nan)) else 'N/A'
+                'RSI': indicators.get('rsi', np.nan),
+                'ADX': indicators.get('adx', np.nan)
             }
             
             # Add MACD for daily
             if tf == 'daily':
                 macd = indicators.get('macd', {})
-                if macd.get('macd') is not None:
-                    row['MACD'] = f"{macd['macd']:.4f}"
-                    row['Signal'] = f"{macd['signal']:.4f}"
-                else:
-                    row['MACD'] = 'N/A'
-                    row['Signal'] = 'N/A'
+                row['MACD'] = macd.get('macd', np.nan)
+                row['Signal'] = macd.get('signal', np.nan)
             
             indicator_data.append(row)
     
     if indicator_data:
         df_indicators = pd.DataFrame(indicator_data)
-        st.dataframe(df_indicators, use_container_width=True)
+        st.dataframe(_format_table(df_indicators, INDICATOR_TABLE_FORMATS), use_container_width=True)
         
         # Display Bollinger Bands and Support/Resistance for daily
         if 'daily' in analysis['timeframes']:
@@ -338,15 +506,7 @@ def display_trading_decision(analysis_result: Dict):
     score = decision_data.get('score', 0)
     
     # Color coding
-    if decision == 'BUY':
-        decision_color = '🟢'
-        bg_color = '#d4edda'
-    elif decision == 'SELL':
-        decision_color = '🔴'
-        bg_color = '#f8d7da'
-    else:
-        decision_color = '🟡'
-        bg_color = '#fff3cd'
+    decision_color, bg_color = DECISION_STYLES.get(decision, DECISION_STYLES['HOLD'])
     
     # Display decision
     st.markdown(f"""
@@ -361,25 +521,88 @@ def display_trading_decision(analysis_result: Dict):
     st.subheader("💡 Key Insights")
     
     # Risk assessment
-    if confidence == 'High':
-        risk_level = "Low to Medium"
-    elif confidence == 'Medium':
-        risk_level = "Medium"
-    else:
-        risk_level = "High"
-    
-    st.write(f"**Risk Level:** {risk_level}")
+    st.write(f"**Risk Level:** {RISK_LEVELS.get(confidence, 'High')}")
     
     # Time horizon recommendation
-    if decision == 'BUY':
-        st.write("**Recommended Time Horizon:** Short to Medium term (1-4 weeks)")
-        st.write("**Entry Strategy:** Consider gradual accumulation on dips")
-    elif decision == 'SELL':
-        st.write("**Recommended Time Horizon:** Immediate to Short term")
-        st.write("**Exit Strategy:** Consider partial profit booking")
-    else:
-        st.write("**Recommended Action:** Wait for clearer signals")
-        st.write("**Monitoring:** Watch for breakout or breakdown patterns")
+    for line in DECISION_GUIDANCE.get(decision, DECISION_GUIDANCE['HOLD']):
+        st.write(line)
+
+@st.cache_data(ttl=900, show_spinner=False)
+def _build_chart_figure(symbol: str, _tech_engine: PreMarketTechnicalAnalysisEngine) -> Optional[Dict]:
+    """Build the 3-panel price/RSI/volume chart once and cache it as a plotly figure dict."""
+    # Plotly is only needed when charts are shown, so keep it off the dashboard's import path
+    import plotly.graph_objects as go
+    from plotly.subplots import make_subplots
+    
+    data = _cached_chart_frame(symbol, _tech_engine)
+    
+    if data.empty:
+        return None
+    
+    # Create candlestick chart
+    fig = make_subplots(
+        rows=3, cols=1,
+        shared_xaxes=True,
+        vertical_spacing=0.05,
+        subplot_titles=['Price & Bollinger Bands', 'RSI', 'Volume'],
+        row_heights=[0.6, 0.2, 0.2]
+    )
+    
+    # Candlestick chart
+    fig.add_trace(
+        go.Candlestick(
+            x=data.index,
+            open=data['Open'],
+            high=data['High'],
+            low=data['Low'],
+            close=data['Close'],
+            name='Price'
+        ),
+        row=1, col=1
+    )
+    
+    # Add Bollinger Bands
+    fig.add_trace(
+        go.Scatter(x=data.index, y=data['bb_upper'], name='BB Upper', line=dict(color='red', dash='dash')),
+        row=1, col=1
+    )
+    fig.add_trace(
+        go.Scatter(x=data.index, y=data['bb_mid'], name='BB Middle', line=dict(color='blue')),
+        row=1, col=1
+    )
+    fig.add_trace(
+        go.Scatter(x=data.index, y=data['bb_lower'], name='BB Lower', line=dict(color='red', dash='dash')),
+        row=1, col=1
+    )
+    
+    # RSI
+    fig.add_trace(
+        go.Scatter(x=data.index, y=data['rsi'], name='RSI', line=dict(color='purple')),
+        row=2, col=1
+    )
+    # Add RSI levels
+    fig.add_hline(y=70, line_dash="dash", line_color="red", row=2, col=1)
+    fig.add_hline(y=30, line_dash="dash", line_color="green", row=2, col=1)
+    
+    # Volume
+    fig.add_trace(
+        go.Bar(x=data.index, y=data['Volume'], name='Volume', marker_color='lightblue'),
+        row=3, col=1
+    )
+    
+    # Update layout
+    fig.update_layout(
+        title=f"{symbol} - Technical Analysis Chart",
+        height=800,
+        showlegend=True,
+        xaxis_rangeslider_visible=False
+    )
+    
+    fig.update_yaxes(title_text="Price (₹)", row=1, col=1)
+    fig.update_yaxes(title_text="RSI", row=2, col=1, range=[0, 100])
+    fig.update_yaxes(title_text="Volume", row=3, col=1)
+    
+    return fig.to_dict()
 
 def display_price_charts(symbol: str, tech_engine: PreMarketTechnicalAnalysisEngine):
     """Display interactive price charts with indicators."""
@@ -387,228 +610,137 @@ def display_price_charts(symbol: str, tech_engine: PreMarketTechnicalAnalysisEng
     st.subheader("📈 Price Charts")
     
     try:
-        # Get daily data for charting
-        data = tech_engine.get_ohlcv_data(symbol, period="3mo", interval="1d")
+        import plotly.graph_objects as go
+        
+        figure = _build_chart_figure(symbol, tech_engine)
         
-        if data.empty:
+        if figure is None:
             st.warning("No chart data available")
             return
         
-        # Create candlestick chart
-        fig = make_subplots(
-            rows=3, cols=1,
-            shared_xaxes=True,
-            vertical_spacing=0.05,
-            subplot_titles=['Price & Bollinger Bands', 'RSI', 'Volume'],
-            row_heights=[0.6, 0.2, 0.2]
-        )
-        
-        # Candlestick chart
-        fig.add_trace(
-            go.Candlestick(
-                x=data.index,
-                open=data['Open'],
-                high=data['High'],
-                low=data['Low'],
-                close=data['Close'],
-                name='Price'
-            ),
-            row=1, col=1
-        )
-        
-        # Add Bollinger Bands
-        try:
-            import ta
-            bb = ta.volatility.BollingerBands(close=data['Close'])
-            
-            fig.add_trace(
-                go.Scatter(x=data.index, y=bb.bollinger_hband(), name='BB Upper', line=dict(color='red', dash='dash')),
-                row=1, col=1
-            )
-            fig.add_trace(
-                go.Scatter(x=data.index, y=bb.bollinger_mavg(), name='BB Middle', line=dict(color='blue')),
-                row=1, col=1
-            )
-            fig.add_trace(
-                go.Scatter(x=data.index, y=bb.bollinger_lband(), name='BB Lower', line=dict(color='red', dash='dash')),
-                row=1, col=1
-            )
-        except:
-            pass
-        
-        # RSI
-        try:
-            rsi = ta.momentum.RSIIndicator(close=data['Close'])
-            fig.add_trace(
-                go.Scatter(x=data.index, y=rsi.rsi(), name='RSI', line=dict(color='purple')),
-                row=2, col=1
-            )
-            # Add RSI levels
-            fig.add_hline(y=70, line_dash="dash", line_color="red", row=2, col=1)
-            fig.add_hline(y=30, line_dash="dash", line_color="green", row=2, col=1)
-        except:
-            pass
-        
-        # Volume
-        fig.add_trace(
-            go.Bar(x=data.index, y=data['Volume'], name='Volume', marker_color='lightblue'),
-            row=3, col=1
-        )
-        
-        # Update layout
-        fig.update_layout(
-            title=f"{symbol} - Technical Analysis Chart",
-            height=800,
-            showlegend=True,
-            xaxis_rangeslider_visible=False
-        )
-        
-        fig.update_yaxes(title_text="Price (₹)", row=1, col=1)
-        fig.update_yaxes(title_text="RSI", row=2, col=1, range=[0, 100])
-        fig.update_yaxes(title_text="Volume", row=3, col=1)
-        
-        st.plotly_chart(fig, use_container_width=True)
+        st.plotly_chart(go.Figure(figure), use_container_width=True)
         
     except Exception as e:
         st.error(f"Error creating charts: {str(e)}")
 
-def display_analysis_summary_table(results: List[Dict], show_ohlcv: bool, show_indicators: bool, show_decisions: bool):
-    """Display summary table of analysis results."""
+def _flatten_results(results: List[Dict], include_ohlcv: bool = True, include_indicators: bool = True,
+                     include_decisions: bool = True) -> pd.DataFrame:
+    """
+    Flatten nested analysis results into one row per symbol with the daily OHLCV,
+    daily indicators, relative strength and trading decision as plain columns.
+    Sections that are not included are never looked up.
+    """
+    flat = {'symbol': [result['symbol'] for result in results]}
+    
+    if include_ohlcv or include_indicators:
+        daily = [result['analysis']['timeframes'].get('daily', {}) for result in results]
+    
+    if include_ohlcv:
+        ohlcv = [d.get('ohlcv', {}) for d in daily]
+        for key in ('close', 'high', 'low', 'volume'):
+            flat[key] = np.array([o.get(key, np.nan) for o in ohlcv], dtype=np.float64)
+    
+    if include_indicators:
+        indicators = [d.get('indicators', {}) for d in daily]
+        kst = [i.get('kst') if isinstance(i.get('kst'), dict) else {} for i in indicators]
+        rs = [i.get('relative_strength') if isinstance(i.get('relative_strength'), dict) else {} for i in indicators]
+        
+        flat['daily_rsi'] = np.array([i.get('rsi', np.nan) for i in indicators], dtype=np.float64)
+        flat['daily_adx'] = np.array([i.get('adx', np.nan) for i in indicators], dtype=np.float64)
+        flat['daily_kst'] = np.array([k.get('kst', np.nan) for k in kst], dtype=np.float64)
+        flat['rs'] = np.array([r.get('relative_strength', np.nan) for r in rs], dtype=np.float64)
+        flat['rs_rank'] = np.array([r.get('rs_rank', np.nan) for r in rs], dtype=np.float64)
+        flat['outperformance'] = [r.get('outperformance', 'N/A') for r in rs]
+    
+    if include_decisions:
+        decisions = [result['decision'] for result in results]
+        flat['decision'] = [d['decision'] for d in decisions]
+        flat['confidence'] = [d['confidence'] for d in decisions]
+        flat['score'] = [d.get('score', 0) for d in decisions]
+    
+    flat['tradingview_link'] = [result['tradingview_link'] for result in results]
+    
+    return pd.DataFrame(flat)
+
+def _build_summary_frame(flat_results: pd.DataFrame, show_ohlcv: bool, show_indicators: bool,
+                         show_decisions: bool) -> pd.DataFrame:
+    """Select the summary columns enabled by the display flags and give them their table labels."""
+    columns = ['symbol']
+    if show_ohlcv:
+        columns += ['close', 'high', 'low', 'volume']
+    if show_indicators:
+        columns += ['daily_rsi', 'daily_adx', 'daily_kst', 'rs', 'rs_rank', 'outperformance']
+    if show_decisions:
+        columns += ['decision', 'confidence', 'score']
+    # TradingView link (store URL for clickable display)
+    columns.append('tradingview_link')
+    
+    df_summary = flat_results[columns].rename(columns=FLAT_RESULT_COLUMNS)
+    if show_ohlcv:
+        df_summary['Volume'] = format_volume_column(df_summary['Volume'])
+    if show_decisions:
+        # Colour-code decisions with an emoji prefix so the table renders without a Styler
+        decisions = df_summary['Decision'].to_numpy()
+        df_summary['Decision'] = np.select(
+            [decisions == 'BUY', decisions == 'SELL'], ['🟢 BUY', '🔴 SELL'], default='🟡 HOLD'
+        )
+    
+    # Arrow-backed columns hand straight to st.dataframe's Arrow serializer
+    return df_summary.convert_dtypes(convert_integer=False, dtype_backend='pyarrow')
+
+def _summary_column_config(df_summary: pd.DataFrame) -> Dict:
+    """Column display settings for the summary table: number formats and the TradingView link."""
+    column_config = {
+        col: st.column_config.NumberColumn(format=fmt)
+        for col, fmt in SUMMARY_TABLE_FORMATS.items() if col in df_summary.columns
+    }
+    column_config['TradingView'] = st.column_config.LinkColumn(
+        "TradingView Chart",
+        help="Click to view chart on TradingView",
+        display_text="View Chart"
+    )
+    return column_config
+
+def _results_key(results: List[Dict]) -> Tuple[Tuple[str, str], ...]:
+    """Small hashable fingerprint of a batch of analysis results."""
+    return tuple((result['symbol'], result['timestamp']) for result in results)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _cached_flat_results(results_key: Tuple[Tuple[str, str], ...], _results: List[Dict]) -> pd.DataFrame:
+    """
+    Fully flattened batch results, keyed by _results_key. Every section is kept so that
+    toggling display options only re-selects columns instead of re-flattening.
+    """
+    return _flatten_results(_results)
+
+def display_analysis_summary_table(flat_results: pd.DataFrame, show_ohlcv: bool, show_indicators: bool, show_decisions: bool):
+    """Display summary table of flattened analysis results (see _flatten_results)."""
     
-    if not results:
+    if flat_results.empty:
         st.warning("No analysis results to display")
         return
     
-    # Create summary dataframe
-    summary_data = []
+    df_summary = _build_summary_frame(flat_results, show_ohlcv, show_indicators, show_decisions)
     
-    for result in results:
-        try:
-            symbol = result['symbol']
-            analysis = result['analysis']
-            decision = result['decision']
-            tradingview_link = result['tradingview_link']
-            
-            row = {'Symbol': symbol}
-            
-            # Add OHLCV data
-            if show_ohlcv and 'daily' in analysis['timeframes']:
-                daily = analysis['timeframes']['daily']
-                if 'ohlcv' in daily:
-                    ohlcv = daily['ohlcv']
-                    row.update({
-                        'Price (₹)': ohlcv['close'],
-                        'High (₹)': ohlcv['high'],
-                        'Low (₹)': ohlcv['low'],
-                        'Volume': format_volume(ohlcv['volume'])
-                    })
-            
-            # Add indicators
-            if show_indicators and 'daily' in analysis['timeframes'] and 'indicators' in analysis['timeframes']['daily']:
-                daily_indicators = analysis['timeframes']['daily']['indicators']
-                
-                # Basic indicators
-                rsi_val = daily_indicators.get('rsi', np.nan)
-                adx_val = daily_indicators.get('adx', np.nan)
-                
-                # KST indicators
-                kst_data = daily_indicators.get('kst', {})
-                kst_val = kst_data.get('kst', np.nan) if isinstance(kst_data, dict) else np.nan
-                
-                # Relative strength indicators
-                rs_data = daily_indicators.get('relative_strength', {})
-                rs_val = rs_data.get('relative_strength', np.nan) if isinstance(rs_data, dict) else np.nan
-                rs_rank = rs_data.get('rs_rank', np.nan) if isinstance(rs_data, dict) else np.nan
-                outperformance = rs_data.get('outperformance', 'N/A') if isinstance(rs_data, dict) else 'N/A'
-                
-                row.update({
-                    'Daily RSI': f"{rsi_val:.1f}" if not pd.isna(rsi_val) else 'N/A',
-                    'Daily ADX': f"{adx_val:.1f}" if not pd.isna(adx_val) else 'N/A',
-                    'KST': f"{kst_val:.1f}" if not pd.isna(kst_val) else 'N/A',
-                    'Rel. Strength': f"{rs_val:.1f}%" if not pd.isna(rs_val) else 'N/A',
-                    'RS Rank': f"{rs_rank:.0f}" if not pd.isna(rs_rank) else 'N/A',
-                    'vs Benchmark': outperformance
-                })
-            elif show_indicators:
-                # Add N/A values when indicators are not available
-                row.update({
-                    'Daily RSI': 'N/A',
-                    'Daily ADX': 'N/A',
-                    'KST': 'N/A',
-                    'Rel. Strength': 'N/A',
-                    'RS Rank': 'N/A',
-                    'vs Benchmark': 'N/A'
-                })
-            
-            # Add decision
-            if show_decisions:
-                row.update({
-                    'Decision': decision['decision'],
-                    'Confidence': decision['confidence'],
-                    'Score': decision.get('score', 0)
-                })
-            
-            # Add TradingView link (store URL for clickable display)
-            row['TradingView'] = result['tradingview_link']
-            
-            summary_data.append(row)
-            
-        except Exception as e:
-            st.warning(f"Error processing result for {result.get('symbol', 'Unknown')}: {str(e)}")
+    st.dataframe(df_summary, use_container_width=True, column_config=_summary_column_config(df_summary))
     
-    if summary_data:
-        df_summary = pd.DataFrame(summary_data)
+    # Summary statistics
+    if show_decisions:
+        decision_counts = flat_results['decision'].value_counts()
+        col1, col2, col3 = st.columns(3)
         
-        # Apply color coding for decisions
-        def color_decision(val):
-            if val == 'BUY':
-                return 'background-color: #d4edda'
-            elif val == 'SELL':
-                return 'background-color: #f8d7da'
-            else:
-                return 'background-color: #fff3cd'
+        with col1:
+            st.metric("🟢 BUY Signals", int(decision_counts.get('BUY', 0)))
         
-        # Configure columns for better display
-        column_config = {}
-        if 'TradingView' in df_summary.columns:
-            column_config['TradingView'] = st.column_config.LinkColumn(
-                "TradingView Chart",
-                help="Click to view chart on TradingView",
-                display_text="View Chart"
-            )
+        with col2:
+            st.metric("🔴 SELL Signals", int(decision_counts.get('SELL', 0)))
         
-        if 'Decision' in df_summary.columns:
-            styled_df = df_summary.style.applymap(color_decision, subset=['Decision'])
-            st.dataframe(styled_df, use_container_width=True, column_config=column_config)
-        else:
-            st.dataframe(df_summary, use_container_width=True, column_config=column_config)
-        
-        # Summary statistics
-        if show_decisions and 'Decision' in df_summary.columns:
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                buy_count = len(df_summary[df_summary['Decision'] == 'BUY'])
-                st.metric("🟢 BUY Signals", buy_count)
-            
-            with col2:
-                sell_count = len(df_summary[df_summary['Decision'] == 'SELL'])
-                st.metric("🔴 SELL Signals", sell_count)
-            
-            with col3:
-                hold_count = len(df_summary[df_summary['Decision'] == 'HOLD'])
-                st.metric("🟡 HOLD Signals", hold_count)
-
-def format_volume(volume: int) -> str:
-    """Format volume in readable format."""
-    if volume >= 10000000:  # 1 Crore
-        return f"{volume/10000000:.1f}Cr"
-    elif volume >= 100000:  # 1 Lakh
-        return f"{volume/100000:.1f}L"
-    elif volume >= 1000:  # 1 Thousand
-        return f"{volume/1000:.1f}K"
-    else:
-        return str(volume)
+        with col3:
+            st.metric("🟡 HOLD Signals", int(decision_counts.get('HOLD', 0)))
+
+def _format_table(df: pd.DataFrame, formats: Dict[str, str]):
+    """Style numeric columns of ``df`` for display, rendering missing values as 'N/A'."""
+    return df.style.format({col: fmt for col, fmt in formats.items() if col in df.columns}, na_rep='N/A')
 
 # Main function for integration
 def show_advanced_premarket_technical_analysis(kite=None):
@@ -8,8 +8,12 @@ Author: AI Assistant for Indian Stock Market Pre-Market Analysis
 Created: 2025-01-27
 """
 
+import sys
+import bisect
+import numpy as np
 from datetime import time, date
-from typing import List, Dict
+from types import MappingProxyType
+from typing import List, Dict, Mapping
 
 class PreMarketConfig:
     """Configuration class for pre-market analysis settings."""
@@ -34,8 +38,8 @@ class PreMarketConfig:
     PRICE_MOVEMENT_WEIGHT = 0.3        # 30% weight for price movement
     VOLATILITY_WEIGHT = 0.3            # 30% weight for volatility
     
-    # Indian market holidays 2025 (major ones)
-    INDIAN_MARKET_HOLIDAYS_2025 = [
+    # Indian market holidays 2025 (major ones) - a frozenset for O(1) "is this a holiday" checks
+    INDIAN_MARKET_HOLIDAYS_2025 = frozenset({
         date(2025, 1, 26),  # Republic Day
         date(2025, 3, 14),  # Holi
         date(2025, 4, 18),  # Good Friday
@@ -43,10 +47,13 @@ class PreMarketConfig:
         date(2025, 10, 2),  # Gandhi Jayanti
         date(2025, 11, 1),  # Diwali (approximate)
         date(2025, 12, 25), # Christmas
-    ]
+    })
     
-    # High-liquidity stocks most relevant for pre-market analysis
-    PREMARKET_FOCUS_STOCKS = [
+    # Holiday ordinals, so a trading-day check is a weekday test plus one int lookup
+    _NON_TRADING_ORDINALS = frozenset(d.toordinal() for d in INDIAN_MARKET_HOLIDAYS_2025)
+    
+    # High-liquidity stocks most relevant for pre-market analysis (immutable, interned symbols)
+    PREMARKET_FOCUS_STOCKS = tuple(sys.intern(symbol) for symbol in (
         # Banking & Financial Services
         "HDFCBANK", "ICICIBANK", "SBIN", "KOTAKBANK", "AXISBANK", "INDUSINDBK",
         "BAJFINANCE", "BAJAJFINSV", "SBILIFE", "HDFCLIFE",
@@ -94,7 +101,10 @@ class PreMarketConfig:
         
         # Media & Entertainment
         "ZEEL", "SUNTV", "NETWORK18"
-    ]
+    ))
+    
+    # Unordered view of the focus stocks for membership checks
+    PREMARKET_FOCUS_STOCKS_SET = frozenset(PREMARKET_FOCUS_STOCKS)
     
     @classmethod
     def get_volume_category(cls, volume: int) -> str:
@@ -108,6 +118,11 @@ class PreMarketConfig:
         else:
             return "Low"
     
+    @classmethod
+    def is_trading_day(cls, d: date) -> bool:
+        """Check if the market is open on the given date (weekday and not a holiday)."""
+        return d.weekday() < 5 and d.toordinal() not in cls._NON_TRADING_ORDINALS
+    
     @classmethod
     def is_big_move(cls, price_change_pct: float) -> bool:
         """Check if price movement is considered significant."""
@@ -118,77 +133,69 @@ class PreMarketConfig:
         """Check if volatility is considered high."""
         return volatility_pct >= cls.HIGH_VOLATILITY_THRESHOLD
     
+    # Tiered score lookup tables: score = SCORES[number of cut-offs the value reaches]
+    _VOLUME_SCORE_CUTS = np.array([MIN_VOLUME_THRESHOLD, HIGH_VOLUME_THRESHOLD, VERY_HIGH_VOLUME_THRESHOLD])
+    _VOLUME_SCORES = np.array([10, 20, 30, 40])        # 0-40 points
+    _PRICE_SCORE_CUTS = np.array([1.0, 3.0, 5.0])
+    _PRICE_SCORES = np.array([5, 15, 25, 30])          # 0-30 points
+    _VOLATILITY_SCORE_CUTS = np.array([3.0, 5.0, 8.0])
+    _VOLATILITY_SCORES = np.array([5, 15, 25, 30])     # 0-30 points
+    
     @classmethod
     def calculate_premarket_score(cls, volume: int, price_change_pct: float, volatility_pct: float) -> float:
         """
         Calculate pre-market interest score.
         Returns score from 0-100 based on volume, price movement, and volatility.
         """
-        # Volume score (0-40 points)
-        if volume >= cls.VERY_HIGH_VOLUME_THRESHOLD:
-            volume_score = 40
-        elif volume >= cls.HIGH_VOLUME_THRESHOLD:
-            volume_score = 30
-        elif volume >= cls.MIN_VOLUME_THRESHOLD:
-            volume_score = 20
-        else:
-            volume_score = 10
-        
-        # Price movement score (0-30 points)
-        abs_price_change = abs(price_change_pct)
-        if abs_price_change >= 5:
-            price_score = 30
-        elif abs_price_change >= 3:
-            price_score = 25
-        elif abs_price_change >= 1:
-            price_score = 15
-        else:
-            price_score = 5
-        
-        # Volatility score (0-30 points)
-        if volatility_pct >= 8:
-            volatility_score = 30
-        elif volatility_pct >= 5:
-            volatility_score = 25
-        elif volatility_pct >= 3:
-            volatility_score = 15
-        else:
-            volatility_score = 5
+        return float(cls.calculate_premarket_score_vec(volume, price_change_pct, volatility_pct))
+    
+    @classmethod
+    def calculate_premarket_score_vec(cls, volumes, price_change_pcts, volatility_pcts) -> np.ndarray:
+        """
+        Vectorized calculate_premarket_score over whole columns, using one binary search
+        per feature instead of an if/elif chain per value.
+        """
+        volume_score = cls._VOLUME_SCORES[np.searchsorted(cls._VOLUME_SCORE_CUTS, volumes, side='right')]
+        price_score = cls._PRICE_SCORES[np.searchsorted(cls._PRICE_SCORE_CUTS, np.abs(price_change_pcts), side='right')]
+        volatility_score = cls._VOLATILITY_SCORES[np.searchsorted(cls._VOLATILITY_SCORE_CUTS, volatility_pcts, side='right')]
         
         total_score = volume_score + price_score + volatility_score
-        return min(100, total_score)  # Cap at 100
+        return np.minimum(100, total_score)  # Cap at 100
+    
+    # Recommendation tiers: _RECOMMENDATION_TABLE[number of score cut-offs reached].
+    # Shared read-only payloads, so callers must not (and cannot) mutate them.
+    _RECOMMENDATION_CUTS = (40, 60, 80)
+    _RECOMMENDATION_TABLE = (
+        MappingProxyType({
+            "priority": "Low",
+            "action": "Low priority for pre-market - consider other options",
+            "risk": "Limited activity expected",
+            "color": "secondary"
+        }),
+        MappingProxyType({
+            "priority": "Medium",
+            "action": "Secondary consideration - monitor if primary picks unavailable",
+            "risk": "Lower priority, moderate activity expected",
+            "color": "warning"
+        }),
+        MappingProxyType({
+            "priority": "High",
+            "action": "Good pre-market focus - consider for watchlist",
+            "risk": "Moderate risk-reward profile",
+            "color": "info"
+        }),
+        MappingProxyType({
+            "priority": "Very High",
+            "action": "Monitor closely - excellent pre-market candidate",
+            "risk": "High reward potential, manage risk carefully",
+            "color": "success"
+        }),
+    )
     
     @classmethod
-    def get_premarket_recommendations(cls, score: float) -> Dict[str, str]:
+    def get_premarket_recommendations(cls, score: float) -> Mapping[str, str]:
         """Get recommendations based on pre-market score."""
-        if score >= 80:
-            return {
-                "priority": "Very High",
-                "action": "Monitor closely - excellent pre-market candidate",
-                "risk": "High reward potential, manage risk carefully",
-                "color": "success"
-            }
-        elif score >= 60:
-            return {
-                "priority": "High",
-                "action": "Good pre-market focus - consider for watchlist",
-                "risk": "Moderate risk-reward profile",
-                "color": "info"
-            }
-        elif score >= 40:
-            return {
-                "priority": "Medium",
-                "action": "Secondary consideration - monitor if primary picks unavailable",
-                "risk": "Lower priority, moderate activity expected",
-                "color": "warning"
-            }
-        else:
-            return {
-                "priority": "Low",
-                "action": "Low priority for pre-market - consider other options",
-                "risk": "Limited activity expected",
-                "color": "secondary"
-            }
+        return cls._RECOMMENDATION_TABLE[bisect.bisect_right(cls._RECOMMENDATION_CUTS, score)]
 
 # Pre-market analysis display settings
 PREMARKET_DISPLAY_CONFIG = {
@@ -18,13 +18,45 @@ Created: 2025-01-27
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 from datetime import datetime, date, timedelta
-import calendar
-from typing import Optional
-from kiteconnect import KiteConnect
-from premarket_high_volume_analyzer import PreMarketHighVolumeAnalyzer
+from typing import Optional, TYPE_CHECKING
+from premarket_high_volume_analyzer import PreMarketHighVolumeAnalyzer, kite_session_key
 
-def display_premarket_analysis_interface(kite: Optional[KiteConnect] = None):
+if TYPE_CHECKING:
+    from kiteconnect import KiteConnect
+
+# Volume buckets from the analyzer, lowest to highest
+_VOLUME_CATEGORY_DTYPE = pd.CategoricalDtype(['Low', 'Medium', 'High', 'Very High'], ordered=True)
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _get_analyzer(kite_key: str, _kite: "Optional[KiteConnect]" = None) -> PreMarketHighVolumeAnalyzer:
+    """Shared analyzer per kite session; ``kite_key`` is kite_session_key(kite) since the client itself isn't hashable."""
+    return PreMarketHighVolumeAnalyzer(_kite)
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _last_trading_day(today: date, _analyzer: PreMarketHighVolumeAnalyzer) -> date:
+    """Last trading day on or before ``today``, computed once per day."""
+    return _analyzer.get_last_trading_day(today)
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _fetch_premarket_df(selected_date: date, has_kite: bool, _analyzer: PreMarketHighVolumeAnalyzer) -> pd.DataFrame:
+    """
+    High volume pre-market data for a date. ``has_kite`` is part of the key so data
+    fetched before login is not served once a kite session exists.
+    """
+    df = _analyzer.get_premarket_high_volume_stocks(selected_date)
+    if not df.empty:
+        df['symbol'] = df['symbol'].astype('category')
+        df['volume_category'] = df['volume_category'].astype(_VOLUME_CATEGORY_DTYPE)
+    return df
+
+@st.cache_data(ttl=300, show_spinner=False)
+def _fetch_insights(selected_date: date, has_kite: bool, _analyzer: PreMarketHighVolumeAnalyzer) -> dict:
+    """Pre-market insights for the cached data of a date."""
+    return _analyzer.get_premarket_insights(_fetch_premarket_df(selected_date, has_kite, _analyzer))
+
+def display_premarket_analysis_interface(kite: "Optional[KiteConnect]" = None):
     """
     Main interface for pre-market analysis when market is closed.
     Specifically designed for pre-market preparation and planning.
@@ -32,7 +64,7 @@ def display_premarket_analysis_interface(kite: Optional[KiteConnect] = None):
     st.markdown("### 🌅 Pre-Market High Volume Stock Analysis")
     
     # Pre-market session indicator
-    analyzer = PreMarketHighVolumeAnalyzer(kite)
+    analyzer = _get_analyzer(kite_session_key(kite), kite)
     is_premarket = analyzer.is_premarket_session()
     
     if is_premarket:
@@ -46,7 +78,7 @@ def display_premarket_analysis_interface(kite: Optional[KiteConnect] = None):
     
     with col1:
         st.markdown("#### 📊 Select Analysis Date")
-        default_date = analyzer.get_last_trading_day()
+        default_date = _last_trading_day(date.today(), analyzer)
         
         selected_date = st.date_input(
             "Choose trading day for pre-market analysis:",
@@ -60,6 +92,10 @@ def display_premarket_analysis_interface(kite: Optional[KiteConnect] = None):
         if st.button("📈 Last Trading Day", help="Analyze most recent trading day"):
             selected_date = default_date
             st.rerun()
+        if st.button("🔄 Refresh Data", help="Discard cached pre-market data and fetch it again"):
+            _fetch_premarket_df.clear()
+            _fetch_insights.clear()
+            st.session_state.pop('premarket_date', None)
     
     with col3:
         st.markdown("#### 🔄 Analysis")
@@ -67,290 +103,290 @@ def display_premarket_analysis_interface(kite: Optional[KiteConnect] = None):
     
     # Display selected date information
     if selected_date:
-        day_name = calendar.day_name[selected_date.weekday()]
+        day_name = _DAY_NAMES[selected_date.weekday()]
         st.markdown(f"**📅 Analysis Date:** {selected_date.strftime('%Y-%m-%d')} ({day_name})")
         
         if selected_date.weekday() >= 5:
             st.warning("⚠️ Selected date is a weekend. Market was closed.")
             return
         
-        # Auto-analyze for default date or when button clicked
-        if analyze_button or selected_date == default_date:
-            _display_premarket_analysis_results(analyzer, selected_date, kite)
+        # Fetch only on an explicit click; later reruns render the stored results
+        if analyze_button:
+            has_kite = kite is not None
+            with st.spinner(f"🔍 Analyzing pre-market data for {selected_date.strftime('%Y-%m-%d')}..."):
+                st.session_state['premarket_df'] = _fetch_premarket_df(selected_date, has_kite, analyzer)
+                st.session_state['premarket_insights'] = _fetch_insights(selected_date, has_kite, analyzer)
+            st.session_state['premarket_date'] = selected_date
+        
+        if st.session_state.get('premarket_date') == selected_date:
+            _display_premarket_analysis_results(analyzer, selected_date,
+                                                st.session_state['premarket_df'],
+                                                st.session_state['premarket_insights'], kite)
+        else:
+            st.info(f"👆 Click **Analyze for Pre-Market** to load data for {selected_date.strftime('%Y-%m-%d')}.")
+
+# Weekday names indexed by date.weekday()
+_DAY_NAMES = ('Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday')
+
+# Highlight card for the top pre-market stock
+_TOP_STOCK_HTML = """
+<div style="padding: 1rem; background-color: #f0f8ff; border-left: 4px solid #1f77b4; border-radius: 5px;">
+    <h3 style="color: #1f77b4; margin: 0;">{stock}</h3>
+    <p style="margin: 0.5rem 0;"><strong>Pre-Market Score:</strong> {score}/100</p>
+    <p style="margin: 0; color: #666;">Highest priority for pre-market analysis</p>
+</div>
+"""
+
+# Table column settings, built once at import instead of on every rerun.
+# Key order is the displayed column order.
+_PRIORITY_COLUMN_CONFIG = {
+    'symbol': 'Symbol',
+    'premarket_score': st.column_config.NumberColumn('Pre-Market Score', format="%.1f"),
+    'close_price': st.column_config.NumberColumn('Close Price (₹)', format="₹%.2f"),
+    'volume_formatted': 'Volume',
+    'price_change_formatted': 'Price Change',
+    'volatility_pct': st.column_config.NumberColumn('Volatility %', format="%.2f%%"),
+    'volume_category': 'Volume Category'
+}
+_VOLUME_LEADERS_COLUMN_CONFIG = {
+    'symbol': 'Symbol',
+    'volume_formatted': 'Volume',
+    'close_price': st.column_config.NumberColumn('Close Price (₹)', format="₹%.2f"),
+    'premarket_score': st.column_config.NumberColumn('Pre-Market Score', format="%.1f"),
+    'volume_category': 'Volume Category'
+}
+_PRICE_MOVERS_COLUMN_CONFIG = {
+    'symbol': 'Symbol',
+    'price_change_pct': st.column_config.NumberColumn('Change %', format="%.2f%%"),
+    'close_price': st.column_config.NumberColumn('Close (₹)', format="₹%.2f"),
+    'premarket_score': st.column_config.NumberColumn('Score', format="%.1f")
+}
+
+def _format_price_change_column(price_change: pd.Series, price_change_pct: pd.Series) -> np.ndarray:
+    """Format price changes as '₹+1.23 (+0.45%)' for a whole column at once."""
+    amounts = np.char.mod('%+.2f', price_change.to_numpy(dtype=np.float64))
+    percents = np.char.mod('%+.2f', price_change_pct.to_numpy(dtype=np.float64))
+    return np.char.add(np.char.add(np.char.add('₹', amounts), ' ('), np.char.add(percents, '%)'))
 
 def _display_premarket_analysis_results(analyzer: PreMarketHighVolumeAnalyzer, 
                                        selected_date: date, 
-                                       kite: Optional[KiteConnect] = None):
-    """Display the pre-market analysis results."""
+                                       df: pd.DataFrame,
+                                       insights: dict,
+                                       kite: "Optional[KiteConnect]" = None):
+    """Display the pre-market analysis results for an already fetched ``df`` and its insights."""
     
-    with st.spinner(f"🔍 Analyzing pre-market data for {selected_date.strftime('%Y-%m-%d')}..."):
-        
-        # Fetch pre-market analysis data
-        df = analyzer.get_premarket_high_volume_stocks(selected_date)
-        
-        if df.empty:
-            st.error(f"❌ No pre-market data available for {selected_date.strftime('%Y-%m-%d')}. Try a different date.")
-            return
-        
-        # Generate insights
-        insights = analyzer.get_premarket_insights(df)
-        
-        # Success message
-        st.success(f"✅ Pre-market analysis complete! Found {len(df)} high-volume stocks for preparation.")
-        
-        # Key Pre-Market Metrics
-        st.markdown("#### 🎯 Pre-Market Preparation Dashboard")
-        
-        col1, col2, col3, col4, col5 = st.columns(5)
+    if df.empty:
+        st.error(f"❌ No pre-market data available for {selected_date.strftime('%Y-%m-%d')}. Try a different date.")
+        return
+    
+    total_stocks = insights.get('total_stocks', 0)
+    very_high_vol_count = insights.get('very_high_volume_count', 0)
+    big_movers_count = insights.get('big_movers_count', 0)
+    high_vol_count = insights.get('high_volatility_count', 0)
+    avg_vol = insights.get('avg_volume', 0)
+    top_stock = insights.get('top_premarket_stock')
+    top_score = insights.get('top_score', 0)
+    
+    # Splits shared by the tabs below, computed once per render
+    price_change_pct = df['price_change_pct'].to_numpy()
+    gainers_mask = price_change_pct > 0
+    losers_mask = price_change_pct < 0
+    gainers = df[gainers_mask]
+    losers = df[losers_mask]
+    gainers_count = int(gainers_mask.sum())
+    losers_count = int(losers_mask.sum())
+    bullish_pct = gainers_count * 100.0 / total_stocks if total_stocks else 0.0
+    bearish_pct = 100.0 - bullish_pct
+    volume_leaders = df.nlargest(20, 'volume')
+    
+    # Success message
+    st.success(f"✅ Pre-market analysis complete! Found {len(df)} high-volume stocks for preparation.")
+    
+    # Key Pre-Market Metrics
+    st.markdown("#### 🎯 Pre-Market Preparation Dashboard")
+    
+    kpis = pd.DataFrame([{
+        "📊 Active Stocks": total_stocks,
+        "🔥 Very High Volume": very_high_vol_count,
+        "📈 Big Movers": big_movers_count,
+        "⚡ High Volatility": high_vol_count,
+        "📊 Avg Volume": analyzer.format_volume(int(avg_vol)),
+    }], index=[''])
+    st.table(kpis)
+    st.caption("Active: volume > 75K · Very High Volume: 50L+ · Big Movers: 3%+ price moves · "
+               "High Volatility: 5%+ · Avg Volume: across all stocks")
+    
+    # Top Pre-Market Stock Highlight
+    if top_stock:
+        st.markdown("---")
+        col1, col2 = st.columns([2, 1])
         
         with col1:
-            st.metric(
-                "📊 Active Stocks", 
-                insights.get('total_stocks', 0),
-                help="Stocks with volume > 75K"
-            )
+            st.markdown("#### 🏆 Top Pre-Market Focus Stock")
+            st.markdown(_TOP_STOCK_HTML.format(stock=top_stock, score=top_score), unsafe_allow_html=True)
         
         with col2:
-            st.metric(
-                "🔥 Very High Volume", 
-                insights.get('very_high_volume_count', 0),
-                help="Stocks with 50L+ volume"
-            )
+            st.markdown("#### 💡 Pre-Market Tip")
+            if top_score >= 80:
+                st.success("🎯 Extremely high interest - monitor closely!")
+            elif top_score >= 60:
+                st.info("📊 High interest - good for pre-market focus")
+            else:
+                st.warning("⚠️ Moderate interest - consider other options")
+    
+    # Pre-Market Analysis Tabs
+    st.markdown("---")
+    tab1, tab2, tab3, tab4 = st.tabs([
+        "🎯 Pre-Market Priorities", 
+        "🔥 Volume Leaders", 
+        "📈 Price Movers", 
+        "💡 Pre-Market Insights"
+    ])
+    
+    with tab1:
+        st.markdown(f"#### 🎯 Top Pre-Market Priority Stocks - {selected_date.strftime('%Y-%m-%d')}")
+        st.markdown("*Ranked by Pre-Market Score (Volume + Price Movement + Volatility)*")
         
-        with col3:
-            st.metric(
-                "📈 Big Movers", 
-                insights.get('big_movers_count', 0),
-                help="Stocks with 3%+ price moves"
-            )
+        priority_df = df.head(15)[['symbol', 'premarket_score', 'close_price', 'volume', 'price_change',
+                                   'price_change_pct', 'volatility_pct', 'volume_category']].copy()
+        priority_df['volume_formatted'] = analyzer.format_volume_column(priority_df['volume'])
+        priority_df['price_change_formatted'] = _format_price_change_column(
+            priority_df['price_change'], priority_df['price_change_pct']
+        )
         
-        with col4:
-            st.metric(
-                "⚡ High Volatility", 
-                insights.get('high_volatility_count', 0),
-                help="Stocks with 5%+ volatility"
-            )
+        st.dataframe(
+            priority_df[list(_PRIORITY_COLUMN_CONFIG)],
+            column_config=_PRIORITY_COLUMN_CONFIG,
+            use_container_width=True
+        )
+    
+    with tab2:
+        st.markdown(f"#### 🔥 Volume Leaders - {selected_date.strftime('%Y-%m-%d')}")
+        st.markdown("*Stocks with highest trading volume - ideal for pre-market liquidity*")
         
-        with col5:
-            avg_vol = insights.get('avg_volume', 0)
-            st.metric(
-                "📊 Avg Volume", 
-                analyzer.format_volume(int(avg_vol)),
-                help="Average volume across all stocks"
-            )
+        display_df = volume_leaders[['symbol', 'volume', 'close_price', 'premarket_score', 'volume_category']].copy()
+        display_df['volume_formatted'] = analyzer.format_volume_column(display_df['volume'])
         
-        # Top Pre-Market Stock Highlight
-        if insights.get('top_premarket_stock'):
-            st.markdown("---")
-            col1, col2 = st.columns([2, 1])
-            
-            with col1:
-                st.markdown("#### 🏆 Top Pre-Market Focus Stock")
-                top_stock = insights['top_premarket_stock']
-                top_score = insights['top_score']
-                
-                st.markdown(f"""
-                <div style="padding: 1rem; background-color: #f0f8ff; border-left: 4px solid #1f77b4; border-radius: 5px;">
-                    <h3 style="color: #1f77b4; margin: 0;">{top_stock}</h3>
-                    <p style="margin: 0.5rem 0;"><strong>Pre-Market Score:</strong> {top_score}/100</p>
-                    <p style="margin: 0; color: #666;">Highest priority for pre-market analysis</p>
-                </div>
-                """, unsafe_allow_html=True)
-            
-            with col2:
-                st.markdown("#### 💡 Pre-Market Tip")
-                if top_score >= 80:
-                    st.success("🎯 Extremely high interest - monitor closely!")
-                elif top_score >= 60:
-                    st.info("📊 High interest - good for pre-market focus")
-                else:
-                    st.warning("⚠️ Moderate interest - consider other options")
+        st.dataframe(
+            display_df[list(_VOLUME_LEADERS_COLUMN_CONFIG)],
+            column_config=_VOLUME_LEADERS_COLUMN_CONFIG,
+            use_container_width=True
+        )
+    
+    with tab3:
+        st.markdown(f"#### 📈 Significant Price Movers - {selected_date.strftime('%Y-%m-%d')}")
+        st.markdown("*Stocks with notable price movements - watch for continuation/reversal*")
         
-        # Pre-Market Analysis Tabs
-        st.markdown("---")
-        tab1, tab2, tab3, tab4 = st.tabs([
-            "🎯 Pre-Market Priorities", 
-            "🔥 Volume Leaders", 
-            "📈 Price Movers", 
-            "💡 Pre-Market Insights"
-        ])
+        # Split into gainers and losers
+        col1, col2 = st.columns(2)
         
-        with tab1:
-            st.markdown(f"#### 🎯 Top Pre-Market Priority Stocks - {selected_date.strftime('%Y-%m-%d')}")
-            st.markdown("*Ranked by Pre-Market Score (Volume + Price Movement + Volatility)*")
-            
-            priority_df = df.head(15).copy()
-            priority_df['volume_formatted'] = priority_df['volume'].apply(analyzer.format_volume)
-            priority_df['price_change_formatted'] = priority_df.apply(
-                lambda x: f"₹{x['price_change']:+.2f} ({x['price_change_pct']:+.2f}%)", axis=1
-            )
+        with col1:
+            st.markdown("##### 🟢 Top Gainers")
+            top_gainers = gainers.nlargest(10, 'price_change_pct')[list(_PRICE_MOVERS_COLUMN_CONFIG)]
             
-            st.dataframe(
-                priority_df[['symbol', 'premarket_score', 'close_price', 'volume_formatted', 
-                           'price_change_formatted', 'volatility_pct', 'volume_category']],
-                column_config={
-                    'symbol': 'Symbol',
-                    'premarket_score': st.column_config.NumberColumn('Pre-Market Score', format="%.1f"),
-                    'close_price': st.column_config.NumberColumn('Close Price (₹)', format="₹%.2f"),
-                    'volume_formatted': 'Volume',
-                    'price_change_formatted': 'Price Change',
-                    'volatility_pct': st.column_config.NumberColumn('Volatility %', format="%.2f%%"),
-                    'volume_category': 'Volume Category'
-                },
-                use_container_width=True
-            )
+            if not top_gainers.empty:
+                st.dataframe(
+                    top_gainers,
+                    column_config=_PRICE_MOVERS_COLUMN_CONFIG,
+                    use_container_width=True
+                )
+            else:
+                st.info("No gainers found")
         
-        with tab2:
-            st.markdown(f"#### 🔥 Volume Leaders - {selected_date.strftime('%Y-%m-%d')}")
-            st.markdown("*Stocks with highest trading volume - ideal for pre-market liquidity*")
-            
-            volume_leaders = df.sort_values('volume', ascending=False).head(20)
-            display_df = volume_leaders.copy()
-            display_df['volume_formatted'] = display_df['volume'].apply(analyzer.format_volume)
+        with col2:
+            st.markdown("##### 🔴 Top Losers")
+            top_losers = losers.nsmallest(10, 'price_change_pct')[list(_PRICE_MOVERS_COLUMN_CONFIG)]
             
-            st.dataframe(
-                display_df[['symbol', 'volume_formatted', 'close_price', 'premarket_score', 'volume_category']],
-                column_config={
-                    'symbol': 'Symbol',
-                    'volume_formatted': 'Volume',
-                    'close_price': st.column_config.NumberColumn('Close Price (₹)', format="₹%.2f"),
-                    'premarket_score': st.column_config.NumberColumn('Pre-Market Score', format="%.1f"),
-                    'volume_category': 'Volume Category'
-                },
-                use_container_width=True
-            )
+            if not top_losers.empty:
+                st.dataframe(
+                    top_losers,
+                    column_config=_PRICE_MOVERS_COLUMN_CONFIG,
+                    use_container_width=True
+                )
+            else:
+                st.info("No losers found")
+    
+    with tab4:
+        st.markdown(f"#### 💡 Pre-Market Preparation Insights - {selected_date.strftime('%Y-%m-%d')}")
         
-        with tab3:
-            st.markdown(f"#### 📈 Significant Price Movers - {selected_date.strftime('%Y-%m-%d')}")
-            st.markdown("*Stocks with notable price movements - watch for continuation/reversal*")
-            
-            # Split into gainers and losers
-            col1, col2 = st.columns(2)
-            
-            with col1:
-                st.markdown("##### 🟢 Top Gainers")
-                gainers = df[df['price_change_pct'] > 0].sort_values('price_change_pct', ascending=False).head(10)
-                
-                if not gainers.empty:
-                    st.dataframe(
-                        gainers[['symbol', 'price_change_pct', 'close_price', 'premarket_score']],
-                        column_config={
-                            'symbol': 'Symbol',
-                            'price_change_pct': st.column_config.NumberColumn('Change %', format="%.2f%%"),
-                            'close_price': st.column_config.NumberColumn('Close (₹)', format="₹%.2f"),
-                            'premarket_score': st.column_config.NumberColumn('Score', format="%.1f")
-                        },
-                        use_container_width=True
-                    )
-                else:
-                    st.info("No gainers found")
+        # Market sentiment analysis
+        col1, col2 = st.columns(2)
+        
+        with col1:
+            st.markdown("##### 📊 Market Sentiment Analysis")
             
-            with col2:
-                st.markdown("##### 🔴 Top Losers")
-                losers = df[df['price_change_pct'] < 0].sort_values('price_change_pct', ascending=True).head(10)
+            if total_stocks > 0:
+                st.markdown(f"- **Bullish Stocks:** {gainers_count} ({bullish_pct:.1f}%)")
+                st.markdown(f"- **Bearish Stocks:** {losers_count} ({bearish_pct:.1f}%)")
                 
-                if not losers.empty:
-                    st.dataframe(
-                        losers[['symbol', 'price_change_pct', 'close_price', 'premarket_score']],
-                        column_config={
-                            'symbol': 'Symbol',
-                            'price_change_pct': st.column_config.NumberColumn('Change %', format="%.2f%%"),
-                            'close_price': st.column_config.NumberColumn('Close (₹)', format="₹%.2f"),
-                            'premarket_score': st.column_config.NumberColumn('Score', format="%.1f")
-                        },
-                        use_container_width=True
-                    )
+                if bullish_pct > 60:
+                    st.success("🟢 **Overall Bullish Sentiment** - Consider long positions")
+                elif bullish_pct < 40:
+                    st.error("🔴 **Overall Bearish Sentiment** - Exercise caution")
                 else:
-                    st.info("No losers found")
+                    st.info("🟡 **Mixed Sentiment** - Stock-specific analysis needed")
         
-        with tab4:
-            st.markdown(f"#### 💡 Pre-Market Preparation Insights - {selected_date.strftime('%Y-%m-%d')}")
+        with col2:
+            st.markdown("##### 🎯 Pre-Market Recommendations")
             
-            # Market sentiment analysis
-            col1, col2 = st.columns(2)
+            # Volume-based recommendations
+            st.markdown("**Focus Areas:**")
             
-            with col1:
-                st.markdown("##### 📊 Market Sentiment Analysis")
-                
-                gainers_count = len(df[df['price_change_pct'] > 0])
-                losers_count = len(df[df['price_change_pct'] < 0])
-                total_stocks = len(df)
-                
-                if total_stocks > 0:
-                    bullish_pct = (gainers_count / total_stocks) * 100
-                    
-                    st.markdown(f"- **Bullish Stocks:** {gainers_count} ({bullish_pct:.1f}%)")
-                    st.markdown(f"- **Bearish Stocks:** {losers_count} ({100-bullish_pct:.1f}%)")
-                    
-                    if bullish_pct > 60:
-                        st.success("🟢 **Overall Bullish Sentiment** - Consider long positions")
-                    elif bullish_pct < 40:
-                        st.error("🔴 **Overall Bearish Sentiment** - Exercise caution")
-                    else:
-                        st.info("🟡 **Mixed Sentiment** - Stock-specific analysis needed")
+            if very_high_vol_count > 0:
+                st.markdown(f"- 🔥 **{very_high_vol_count} stocks** with very high volume - excellent liquidity")
             
-            with col2:
-                st.markdown("##### 🎯 Pre-Market Recommendations")
-                
-                # Volume-based recommendations
-                very_high_vol = insights.get('very_high_volume_count', 0)
-                big_movers = insights.get('big_movers_count', 0)
-                
-                st.markdown("**Focus Areas:**")
-                
-                if very_high_vol > 0:
-                    st.markdown(f"- 🔥 **{very_high_vol} stocks** with very high volume - excellent liquidity")
-                
-                if big_movers > 0:
-                    st.markdown(f"- 📈 **{big_movers} stocks** with 3%+ moves - momentum plays")
-                
-                if insights.get('high_volatility_count', 0) > 0:
-                    st.markdown(f"- ⚡ **{insights['high_volatility_count']} stocks** with high volatility - risk/reward opportunities")
-                
-                # Top 3 recommendations
-                st.markdown("**Top 3 Pre-Market Picks:**")
-                top_3 = df.head(3)
-                for i, (_, stock) in enumerate(top_3.iterrows(), 1):
-                    st.markdown(f"{i}. **{stock['symbol']}** (Score: {stock['premarket_score']:.1f})")
-        
-        # Footer information
-        st.markdown("---")
-        col1, col2, col3 = st.columns(3)
-        
-        with col1:
-            st.markdown(f"**📊 Data Source:** {'Zerodha Kite API' if kite else 'Yahoo Finance'}")
-        
-        with col2:
-            st.markdown(f"**📅 Analysis Date:** {selected_date.strftime('%Y-%m-%d')}")
-        
-        with col3:
-            st.markdown(f"**⏰ Generated:** {datetime.now().strftime('%H:%M:%S')}")
-        
-        # Pre-market preparation tips
-        with st.expander("💡 Pre-Market Preparation Tips"):
-            st.markdown("""
-            **🌅 Pre-Market Success Tips:**
+            if big_movers_count > 0:
+                st.markdown(f"- 📈 **{big_movers_count} stocks** with 3%+ moves - momentum plays")
             
-            1. **Focus on High-Score Stocks** - Prioritize stocks with pre-market scores above 60
-            2. **Check Volume Categories** - 'Very High' and 'High' volume stocks offer better liquidity
-            3. **Monitor Price Movers** - Stocks with 3%+ moves may continue the trend
-            4. **Watch Volatility** - High volatility stocks offer more trading opportunities but higher risk
-            5. **Plan Entry/Exit** - Use this data to set your pre-market and opening bell strategy
+            if high_vol_count > 0:
+                st.markdown(f"- ⚡ **{high_vol_count} stocks** with high volatility - risk/reward opportunities")
             
-            **⚠️ Risk Management:**
-            - Always use stop losses in pre-market trading
-            - Pre-market volumes are typically lower than regular hours
-            - News and events can significantly impact pre-market prices
-            """)
+            # Top 3 recommendations
+            st.markdown("**Top 3 Pre-Market Picks:**")
+            top_3 = df.head(3)
+            st.markdown("\n".join(
+                f"{i}. **{symbol}** (Score: {score:.1f})"
+                for i, (symbol, score) in enumerate(zip(top_3['symbol'].to_numpy(), top_3['premarket_score'].to_numpy()), 1)
+            ))
+    
+    # Footer information
+    st.markdown("---")
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.markdown(f"**📊 Data Source:** {'Zerodha Kite API' if kite else 'Yahoo Finance'}")
+    
+    with col2:
+        st.markdown(f"**📅 Analysis Date:** {selected_date.strftime('%Y-%m-%d')}")
+    
+    with col3:
+        st.markdown(f"**⏰ Generated:** {datetime.now().strftime('%H:%M:%S')}")
+    
+    # Pre-market preparation tips
+    with st.expander("💡 Pre-Market Preparation Tips"):
+        st.markdown("""
+        **🌅 Pre-Market Success Tips:**
+        
+        1. **Focus on High-Score Stocks** - Prioritize stocks with pre-market scores above 60
+        2. **Check Volume Categories** - 'Very High' and 'High' volume stocks offer better liquidity
+        3. **Monitor Price Movers** - Stocks with 3%+ moves may continue the trend
+        4. **Watch Volatility** - High volatility stocks offer more trading opportunities but higher risk
+        5. **Plan Entry/Exit** - Use this data to set your pre-market and opening bell strategy
+        
+        **⚠️ Risk Management:**
+        - Always use stop losses in pre-market trading
+        - Pre-market volumes are typically lower than regular hours
+        - News and events can significantly impact pre-market prices
+        """)
 
-def display_premarket_quick_view(kite: Optional[KiteConnect] = None):
+def display_premarket_quick_view(kite: "Optional[KiteConnect]" = None):
     """
     Quick pre-market view for the sidebar or compact display.
     """
-    analyzer = PreMarketHighVolumeAnalyzer(kite)
+    analyzer = _get_analyzer(kite_session_key(kite), kite)
     
     with st.expander("🌅 Pre-Market Quick View"):
-        last_trading_day = analyzer.get_last_trading_day()
+        last_trading_day = _last_trading_day(date.today(), analyzer)
         
         st.markdown(f"**Last Trading Day:** {last_trading_day.strftime('%Y-%m-%d')}")
         
@@ -23,8 +23,145 @@ from datetime import datetime, date, timedelta, time
 import streamlit as st
 from kiteconnect import KiteConnect
 from typing import List, Dict, Optional, Tuple
-import calendar
-import traceback
+import hashlib
+import logging
+import threading
+import time as time_module
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from dataclasses import dataclass
+from bisect import bisect_right
+from premarket_config import PreMarketConfig
+
+logger = logging.getLogger(__name__)
+
+# High-liquidity stocks most active in pre-market
+PREMARKET_FOCUS_SYMBOLS = (
+    "RELIANCE", "TCS", "HDFCBANK", "INFY", "HINDUNILVR", "ICICIBANK", 
+    "BHARTIARTL", "ITC", "SBIN", "LT", "ASIANPAINT", "AXISBANK",
+    "MARUTI", "BAJFINANCE", "HCLTECH", "DMART", "SUNPHARMA", "TITAN",
+    "ULTRACEMCO", "WIPRO", "NESTLEIND", "POWERGRID", "NTPC", "TECHM",
+    "BAJAJFINSV", "ONGC", "TATAMOTORS", "DIVISLAB", "JSWSTEEL", "GRASIM",
+    "HINDALCO", "ADANIENT", "CIPLA", "COALINDIA", "BRITANNIA", "DRREDDY",
+    "EICHERMOT", "APOLLOHOSP", "BPCL", "TATACONSUM", "INDUSINDBK",
+    "BAJAJ-AUTO", "HEROMOTOCO", "GODREJCP", "SBILIFE", "HDFCLIFE",
+    "TATASTEEL", "PIDILITIND", "BERGEPAINT", "MARICO", "DABUR", "COLPAL",
+    "MCDOWELL-N", "ADANIPORTS", "UPL", "GAIL", "VEDL", "SAIL", "NMDC",
+    "BANKBARODA", "PNB", "CANBK", "UNIONBANK", "IDFCFIRSTB", "FEDERALBNK",
+    "RBLBANK", "BANDHANBNK", "AUBANK", "INDIGO", "SPICEJET", "JUBLFOOD",
+    "ZOMATO", "NYKAA", "PAYTM", "POLICYBZR", "STAR", "ZEEL", "SUNTV"
+)
+
+# Hashed view of the focus stocks for membership checks
+PREMARKET_FOCUS_SYMBOL_SET = frozenset(PREMARKET_FOCUS_SYMBOLS)
+
+# Kite allows 3 historical_data requests per second; requests beyond that are rejected
+HISTORICAL_REQUESTS_PER_SECOND = 3
+HISTORICAL_FETCH_WORKERS = 16
+
+# Instruments per quote() request allowed by Kite
+QUOTE_BATCH_SIZE = 500
+
+# Daily candles fetched per request, so nearby dates are served from the per-token cache
+HISTORICAL_WINDOW_DAYS = 7
+
+ONE_DAY = timedelta(days=1)
+
+# Volume display units for format_volume_column: Thousand, Lakh, Crore
+VOLUME_UNIT_THRESHOLDS = np.array([1000, 100000, 10000000], dtype=np.float64)
+VOLUME_UNIT_DIVISORS = np.array([1, 1000, 100000, 10000000], dtype=np.float64)
+VOLUME_UNIT_SUFFIXES = np.array(['', 'K', 'L', 'Cr'])
+
+def format_volume(volume: int) -> str:
+    """Format volume in readable format (K, L, Cr)."""
+    if volume >= 10000000:  # 1 Crore
+        return f"{volume/10000000:.1f}Cr"
+    elif volume >= 100000:  # 1 Lakh
+        return f"{volume/100000:.1f}L"
+    elif volume >= 1000:  # 1 Thousand
+        return f"{volume/1000:.1f}K"
+    else:
+        return str(volume)
+
+def format_volume_column(volumes) -> np.ndarray:
+    """Format a whole column of volumes like format_volume, using 'N/A' for missing values."""
+    v = np.asarray(volumes, dtype=np.float64)
+    whole = np.nan_to_num(v)
+    
+    # Pick each value's unit once, then scale and format only into that unit
+    scale = np.digitize(whole, VOLUME_UNIT_THRESHOLDS)
+    scaled = np.char.add(np.char.mod('%.1f', whole / VOLUME_UNIT_DIVISORS[scale]), VOLUME_UNIT_SUFFIXES[scale])
+    formatted = np.where(scale == 0, np.char.mod('%d', whole), scaled)
+    
+    return np.where(np.isnan(v), 'N/A', formatted)
+
+def kite_session_key(kite: Optional[KiteConnect]) -> str:
+    """
+    Stable cache key for a kite session: the api key plus a digest of the access token.
+    Unlike id(kite) it is never reused by another client, and it keeps the token itself
+    out of Streamlit's cache keys.
+    """
+    if kite is None:
+        return ""
+    token = getattr(kite, 'access_token', None) or ""
+    return f"{getattr(kite, 'api_key', '')}:{hashlib.sha256(token.encode()).hexdigest()[:16]}"
+
+@dataclass(slots=True)
+class PremarketCandle:
+    """One symbol's daily OHLCV as collected by the fetchers."""
+    symbol: str
+    open: float
+    high: float
+    low: float
+    close: float
+    volume: int
+    session_date: Optional[str] = None  # set when it can differ from the requested date
+
+# Indian market session boundaries and the session in force after each one
+MARKET_SESSION_BOUNDARIES = (
+    PreMarketConfig.PREMARKET_START_TIME,   # 9:00 AM
+    PreMarketConfig.MARKET_OPEN_TIME,       # 9:15 AM
+    PreMarketConfig.MARKET_CLOSE_TIME,      # 3:30 PM
+    PreMarketConfig.POSTMARKET_END_TIME,    # 4:00 PM
+)
+MARKET_SESSIONS = ("closed", "pre_market", "live_market", "post_market", "closed")
+
+# Volume category cut-offs (5L, 10L, 50L) and the label for each bucket, lowest first
+VOLUME_CATEGORY_CUTS = np.array([500000, 1000000, 5000000])
+VOLUME_CATEGORY_LABELS = np.array(["Low", "Medium", "High", "Very High"])
+
+@lru_cache(maxsize=8)
+def _last_trading_day(from_date: date) -> date:
+    """Last trading day on or before ``from_date``, looking back at most 10 days."""
+    # Jump straight from a weekend to Friday, then step back over holidays
+    weekday = from_date.weekday()
+    current_date = from_date - timedelta(days=weekday - 4) if weekday >= 5 else from_date
+    
+    while not PreMarketConfig.is_trading_day(current_date) and (from_date - current_date).days < 10:
+        current_date -= ONE_DAY
+    
+    return current_date
+
+@st.cache_data(ttl=3600, show_spinner=False)
+def _load_symbol_tokens(symbols: Tuple[str, ...], as_of: date, _kite: KiteConnect) -> Dict[str, int]:
+    """
+    NSE instrument tokens for ``symbols``. The full instrument dump is several MB, so it is
+    downloaded at most once an hour and reduced to the few symbols needed; ``as_of`` keys
+    the result to the day so new listings are picked up.
+    """
+    instruments = _kite.instruments("NSE")
+    wanted = PREMARKET_FOCUS_SYMBOL_SET if symbols == PREMARKET_FOCUS_SYMBOLS else frozenset(symbols)
+    
+    # One key lookup per instrument, and stop as soon as every wanted symbol is found
+    symbol_token_map = {}
+    for inst in instruments:
+        tradingsymbol = inst['tradingsymbol']
+        if tradingsymbol in wanted:
+            symbol_token_map[tradingsymbol] = inst['instrument_token']
+            if len(symbol_token_map) == len(wanted):
+                break
+    
+    return symbol_token_map
 
 class PreMarketHighVolumeAnalyzer:
     """
@@ -38,27 +175,24 @@ class PreMarketHighVolumeAnalyzer:
         self.min_volume = 75000
         self.nifty_500_symbols = self._get_premarket_focus_symbols()
         
-    def _get_premarket_focus_symbols(self) -> List[str]:
+        # Shared across fetch threads to stay under the historical API rate limit
+        self._historical_slots = threading.Semaphore(HISTORICAL_REQUESTS_PER_SECOND)
+        self._rate_lock = threading.Lock()
+        self._next_request_at = 0.0
+        
+        # Last get_market_session() answer and the epoch second it was computed in
+        self._session_second = None
+        self._session = "closed"
+        
+        # token -> (window start, window end, {date: candle}) of past daily candles
+        self._ohlc_cache: Dict[int, Tuple[date, date, Dict[date, Dict]]] = {}
+        
+    def _get_premarket_focus_symbols(self) -> Tuple[str, ...]:
         """
         Get list of stocks most relevant for pre-market analysis.
         Focus on high-liquidity, actively traded stocks.
         """
-        return [
-            # High-liquidity stocks most active in pre-market
-            "RELIANCE", "TCS", "HDFCBANK", "INFY", "HINDUNILVR", "ICICIBANK", 
-            "BHARTIARTL", "ITC", "SBIN", "LT", "ASIANPAINT", "AXISBANK",
-            "MARUTI", "BAJFINANCE", "HCLTECH", "DMART", "SUNPHARMA", "TITAN",
-            "ULTRACEMCO", "WIPRO", "NESTLEIND", "POWERGRID", "NTPC", "TECHM",
-            "BAJAJFINSV", "ONGC", "TATAMOTORS", "DIVISLAB", "JSWSTEEL", "GRASIM",
-            "HINDALCO", "ADANIENT", "CIPLA", "COALINDIA", "BRITANNIA", "DRREDDY",
-            "EICHERMOT", "APOLLOHOSP", "BPCL", "TATACONSUM", "INDUSINDBK",
-            "BAJAJ-AUTO", "HEROMOTOCO", "GODREJCP", "SBILIFE", "HDFCLIFE",
-            "TATASTEEL", "PIDILITIND", "BERGEPAINT", "MARICO", "DABUR", "COLPAL",
-            "MCDOWELL-N", "ADANIPORTS", "UPL", "GAIL", "VEDL", "SAIL", "NMDC",
-            "BANKBARODA", "PNB", "CANBK", "UNIONBANK", "IDFCFIRSTB", "FEDERALBNK",
-            "RBLBANK", "BANDHANBNK", "AUBANK", "INDIGO", "SPICEJET", "JUBLFOOD",
-            "ZOMATO", "NYKAA", "PAYTM", "POLICYBZR", "STAR", "ZEEL", "SUNTV"
-        ]
+        return PREMARKET_FOCUS_SYMBOLS
     
     def get_last_trading_day(self, from_date: date = None) -> date:
         """
@@ -68,61 +202,22 @@ class PreMarketHighVolumeAnalyzer:
         if from_date is None:
             from_date = date.today()
         
-        # Major Indian market holidays 2025
-        indian_holidays_2025 = [
-            date(2025, 1, 26),  # Republic Day
-            date(2025, 3, 14),  # Holi
-            date(2025, 4, 18),  # Good Friday
-            date(2025, 8, 15),  # Independence Day
-            date(2025, 10, 2),  # Gandhi Jayanti
-            date(2025, 11, 1),  # Diwali (approximate)
-        ]
-        
-        current_date = from_date
-        
-        while True:
-            # Skip weekends
-            if current_date.weekday() >= 5:
-                current_date -= timedelta(days=1)
-                continue
-            
-            # Skip holidays
-            if current_date in indian_holidays_2025:
-                current_date -= timedelta(days=1)
-                continue
-            
-            # Safety check - don't go back more than 10 days
-            if (from_date - current_date).days > 10:
-                break
-                
-            return current_date
-        
-        return current_date
+        return _last_trading_day(from_date)
     
     def get_market_session(self) -> str:
         """
         Determine current market session based on Indian market timings.
         Returns: 'pre_market', 'live_market', 'post_market', or 'closed'
+        The result is reused for calls within the same wall-clock second.
         """
-        now = datetime.now()
-        current_time = now.time()
-        
-        # Indian market timings
-        pre_market_start = time(9, 0)   # 9:00 AM
-        market_open = time(9, 15)       # 9:15 AM
-        market_close = time(15, 30)     # 3:30 PM
-        post_market_end = time(16, 0)   # 4:00 PM
-        
-        if current_time < pre_market_start:
-            return "closed"
-        elif pre_market_start <= current_time < market_open:
-            return "pre_market"
-        elif market_open <= current_time < market_close:
-            return "live_market"
-        elif market_close <= current_time < post_market_end:
-            return "post_market"
-        else:
-            return "closed"
+        epoch_second = int(time_module.time())
+        if epoch_second == self._session_second:
+            return self._session
+        
+        current_time = datetime.fromtimestamp(epoch_second).time()
+        self._session = MARKET_SESSIONS[bisect_right(MARKET_SESSION_BOUNDARIES, current_time)]
+        self._session_second = epoch_second
+        return self._session
     
     def is_premarket_session(self) -> bool:
         """Check if current time is pre-market session (9:00 AM - 9:15 AM)."""
@@ -136,162 +231,258 @@ class PreMarketHighVolumeAnalyzer:
         if not self.kite:
             return pd.DataFrame()
         
-        stock_data = []
-        
         try:
-            instruments = self.kite.instruments("NSE")
-            symbol_token_map = {inst['tradingsymbol']: inst['instrument_token'] 
-                              for inst in instruments 
-                              if inst['tradingsymbol'] in symbols}
+            symbol_token_map = _load_symbol_tokens(tuple(symbols), date.today(), self.kite)
+            
+            pending = [symbol for symbol in symbols if symbol_token_map.get(symbol)]
+            candles = []
+            
+            # The latest session comes from a few batched quote() calls
+            if target_date == _last_trading_day(date.today()):
+                candles, pending = self._fetch_latest_session_quotes(pending)
+            
+            jobs = [(symbol, symbol_token_map[symbol]) for symbol in pending]
+            
+            with ThreadPoolExecutor(max_workers=HISTORICAL_FETCH_WORKERS) as executor:
+                fetched = executor.map(lambda job: self._fetch_one(job[0], job[1], target_date), jobs)
+                candles.extend(candle for candle in fetched if candle is not None)
+                    
+        except Exception as e:
+            # May run off the main script thread, so the caller reports it to the UI
+            logger.exception("Kite pre-market fetch failed")
+            df = pd.DataFrame()
+            df.attrs['errors'] = [f"Error fetching pre-market data from Kite: {str(e)}"]
+            return df
+        
+        if not candles:
+            return pd.DataFrame()
+        
+        return self._frame_from_candles(candles, target_date.strftime('%Y-%m-%d'))
+    
+    def _fetch_latest_session_quotes(self, symbols: List[str]) -> Tuple[List[PremarketCandle], List[str]]:
+        """
+        Candles of the latest session from batched quote() calls, plus the symbols that still
+        need a historical fetch. quote()'s ohlc close is the previous session's close,
+        so last_price is used as the close.
+        """
+        candles = []
+        missing = []
+        
+        for start in range(0, len(symbols), QUOTE_BATCH_SIZE):
+            batch = symbols[start:start + QUOTE_BATCH_SIZE]
+            try:
+                quotes = self.kite.quote([f"NSE:{symbol}" for symbol in batch])
+            except Exception:
+                logger.warning("quote() failed for %d symbols; falling back to historical data",
+                               len(batch), exc_info=True)
+                missing.extend(batch)
+                continue
             
-            for symbol in symbols:
-                token = symbol_token_map.get(symbol)
-                if not token:
+            for symbol in batch:
+                quote = quotes.get(f"NSE:{symbol}") or {}
+                ohlc = quote.get('ohlc')
+                if not ohlc or quote.get('volume') is None or quote.get('last_price') is None:
+                    missing.append(symbol)
                     continue
                 
-                try:
+                candles.append(PremarketCandle(symbol, ohlc.get('open', 0), ohlc.get('high', 0), ohlc.get('low', 0),
+                                               quote['last_price'], quote['volume']))
+        
+        return candles, missing
+    
+    def _throttle(self):
+        """Block until the next historical request fits in the per-second budget."""
+        with self._rate_lock:
+            now = time_module.monotonic()
+            start_at = max(now, self._next_request_at)
+            self._next_request_at = start_at + 1.0 / HISTORICAL_REQUESTS_PER_SECOND
+        
+        if start_at > now:
+            time_module.sleep(start_at - now)
+    
+    def _fetch_one(self, symbol: str, token: int, target_date: date) -> Optional[PremarketCandle]:
+        """
+        Fetch one symbol's daily candle for ``target_date``, or None if there is no
+        data or the request fails. Runs on a worker thread, so it must not call into Streamlit.
+        """
+        candles = self._cached_candles(token, target_date)
+        
+        if candles is None:
+            window_start = target_date - timedelta(days=HISTORICAL_WINDOW_DAYS)
+            try:
+                with self._historical_slots:
+                    self._throttle()
                     historical_data = self.kite.historical_data(
                         instrument_token=token,
-                        from_date=target_date,
+                        from_date=window_start,
                         to_date=target_date,
                         interval="day"
                     )
-                    
-                    if historical_data:
-                        data = historical_data[0]
-                        volume = data.get('volume', 0)
-                        
-                        if volume >= self.min_volume:
-                            open_price = data.get('open', 0)
-                            close_price = data.get('close', 0)
-                            high_price = data.get('high', 0)
-                            low_price = data.get('low', 0)
-                            
-                            # Calculate metrics important for pre-market analysis
-                            price_change = close_price - open_price
-                            price_change_pct = (price_change / open_price * 100) if open_price > 0 else 0
-                            volatility = ((high_price - low_price) / open_price * 100) if open_price > 0 else 0
-                            
-                            stock_data.append({
-                                'symbol': symbol,
-                                'close_price': close_price,
-                                'volume': volume,
-                                'price_change': price_change,
-                                'price_change_pct': price_change_pct,
-                                'volatility_pct': volatility,
-                                'high': high_price,
-                                'low': low_price,
-                                'open': open_price,
-                                'date': target_date.strftime('%Y-%m-%d'),
-                                'volume_category': self._categorize_volume(volume),
-                                'premarket_score': self._calculate_premarket_score(volume, abs(price_change_pct), volatility),
-                                'last_updated': datetime.now().strftime('%H:%M:%S')
-                            })
-                            
-                except Exception as e:
-                    continue
-                    
-        except Exception as e:
-            st.error(f"Error fetching pre-market data from Kite: {str(e)}")
-            return pd.DataFrame()
+            except Exception:
+                logger.debug("historical_data failed for %s", symbol, exc_info=True)
+                return None
+            
+            candles = {row['date'].date(): row for row in historical_data or ()}
+            self._ohlc_cache[token] = (window_start, target_date, candles)
+        
+        data = candles.get(target_date)
+        if data is None:
+            return None
+        
+        return PremarketCandle(symbol, data.get('open', 0), data.get('high', 0), data.get('low', 0),
+                               data.get('close', 0), data.get('volume', 0))
+    
+    def _cached_candles(self, token: int, target_date: date) -> Optional[Dict[date, Dict]]:
+        """
+        Cached candles for ``token`` if its window covers ``target_date``. Today's candle
+        is still forming, so it is never served from the cache.
+        """
+        entry = self._ohlc_cache.get(token)
+        if entry is None or target_date >= date.today():
+            return None
+        
+        window_start, window_end, candles = entry
+        return candles if window_start <= target_date <= window_end else None
+    
+    def _frame_from_candles(self, candles: List[PremarketCandle], dates) -> pd.DataFrame:
+        """Split ``candles`` into one array per field and build the pre-market table from them."""
+        count = len(candles)
+        return self._build_premarket_frame(
+            [candle.symbol for candle in candles],
+            np.fromiter((candle.open for candle in candles), dtype=np.float64, count=count),
+            np.fromiter((candle.high for candle in candles), dtype=np.float64, count=count),
+            np.fromiter((candle.low for candle in candles), dtype=np.float64, count=count),
+            np.fromiter((candle.close for candle in candles), dtype=np.float64, count=count),
+            np.fromiter((candle.volume for candle in candles), dtype=np.int64, count=count),
+            dates
+        )
+    
+    def _build_premarket_frame(self, symbols, opens, highs, lows, closes, volumes, dates) -> pd.DataFrame:
+        """
+        Build the pre-market table from parallel per-symbol columns, computing every
+        derived metric with whole-array operations. Rows below ``min_volume`` are dropped.
+        """
+        volumes = np.asarray(volumes, dtype=np.int64)
+        keep = volumes >= self.min_volume
+        
+        volumes = volumes[keep]
+        opens = np.asarray(opens, dtype=np.float64)[keep]
+        highs = np.asarray(highs, dtype=np.float64)[keep]
+        lows = np.asarray(lows, dtype=np.float64)[keep]
+        closes = np.asarray(closes, dtype=np.float64)[keep]
+        if not np.isscalar(dates):
+            dates = np.asarray(dates)[keep]
         
-        return pd.DataFrame(stock_data)
+        # Calculate metrics important for pre-market analysis
+        price_change = closes - opens
+        has_open = opens > 0
+        safe_opens = np.where(has_open, opens, 1.0)
+        price_change_pct = np.where(has_open, price_change / safe_opens * 100, 0.0)
+        abs_price_change_pct = np.abs(price_change_pct)
+        volatility = np.where(has_open, (highs - lows) / safe_opens * 100, 0.0)
+        
+        return pd.DataFrame({
+            'symbol': np.asarray(symbols)[keep],
+            'close_price': closes,
+            'volume': volumes,
+            'price_change': price_change,
+            'price_change_pct': price_change_pct,
+            'abs_price_change_pct': abs_price_change_pct,
+            'volatility_pct': volatility,
+            'high': highs,
+            'low': lows,
+            'open': opens,
+            'date': dates,
+            'volume_category': self._categorize_volume(volumes),
+            'premarket_score': self._calculate_premarket_score(volumes, abs_price_change_pct, volatility),
+            'last_updated': datetime.now().strftime('%H:%M:%S')
+        })
     
     def fetch_premarket_data_yfinance(self, symbols: List[str], target_date: date) -> pd.DataFrame:
         """
         Fetch pre-market relevant data using Yahoo Finance for a specific date.
         Enhanced for pre-market analysis requirements.
         """
-        stock_data = []
+        candles = []
         
         start_date = target_date - timedelta(days=5)
         end_date = target_date + timedelta(days=1)
         
-        for symbol in symbols:
+        tickers = [f"{symbol}.NS" for symbol in symbols]
+        target_date_str = target_date.strftime('%Y-%m-%d')
+        
+        # One batched, multi-threaded download instead of a request per symbol
+        try:
+            panel = yf.download(" ".join(tickers), start=start_date, end=end_date, group_by='ticker',
+                                threads=True, progress=False, auto_adjust=True)
+        except Exception:
+            logger.exception("yfinance batch download failed")
+            return pd.DataFrame()
+        
+        if panel.empty:
+            return pd.DataFrame()
+        
+        if not isinstance(panel.columns, pd.MultiIndex):
+            panel = pd.concat({tickers[0]: panel}, axis=1)
+        available = set(panel.columns.get_level_values(0))
+        
+        for symbol, ticker in zip(symbols, tickers):
+            if ticker not in available:
+                continue
+            
             try:
-                ticker = f"{symbol}.NS"
-                stock = yf.Ticker(ticker)
-                
-                hist = stock.history(start=start_date, end=end_date)
+                hist = panel[ticker].dropna(how='all')
                 
                 if hist.empty:
                     continue
                 
-                # Find target date data
-                target_data = None
-                target_date_str = target_date.strftime('%Y-%m-%d')
-                
-                for idx in hist.index:
-                    if idx.strftime('%Y-%m-%d') == target_date_str:
-                        target_data = hist.loc[idx]
-                        break
-                
-                if target_data is None and not hist.empty:
-                    target_data = hist.iloc[-1]
-                    actual_date = hist.index[-1].strftime('%Y-%m-%d')
-                else:
+                # Find target date data, falling back to the latest session
+                hits = np.flatnonzero(hist.index.date == target_date)
+                if len(hits):
+                    position = hits[0]
                     actual_date = target_date_str
+                else:
+                    position = -1
+                    actual_date = hist.index[-1].strftime('%Y-%m-%d')
                 
-                if target_data is not None:
-                    volume = int(target_data['Volume'])
-                    
-                    if volume >= self.min_volume:
-                        open_price = float(target_data['Open'])
-                        close_price = float(target_data['Close'])
-                        high_price = float(target_data['High'])
-                        low_price = float(target_data['Low'])
-                        
-                        price_change = close_price - open_price
-                        price_change_pct = (price_change / open_price * 100) if open_price > 0 else 0
-                        volatility = ((high_price - low_price) / open_price * 100) if open_price > 0 else 0
-                        
-                        stock_data.append({
-                            'symbol': symbol,
-                            'close_price': round(close_price, 2),
-                            'volume': volume,
-                            'price_change': round(price_change, 2),
-                            'price_change_pct': round(price_change_pct, 2),
-                            'volatility_pct': round(volatility, 2),
-                            'high': round(high_price, 2),
-                            'low': round(low_price, 2),
-                            'open': round(open_price, 2),
-                            'date': actual_date,
-                            'volume_category': self._categorize_volume(volume),
-                            'premarket_score': self._calculate_premarket_score(volume, abs(price_change_pct), volatility),
-                            'last_updated': datetime.now().strftime('%H:%M:%S')
-                        })
+                open_price, high_price, low_price, close_price, volume = \
+                    hist[['Open', 'High', 'Low', 'Close', 'Volume']].to_numpy()[position]
+                candles.append(PremarketCandle(symbol, float(open_price), float(high_price), float(low_price),
+                                               float(close_price), int(volume), actual_date))
                         
             except Exception as e:
                 continue
         
-        return pd.DataFrame(stock_data)
+        if not candles:
+            return pd.DataFrame()
+        
+        df = self._frame_from_candles(candles, [candle.session_date for candle in candles])
+        price_columns = ['close_price', 'price_change', 'price_change_pct', 'abs_price_change_pct',
+                         'volatility_pct', 'high', 'low', 'open']
+        df[price_columns] = df[price_columns].round(2)
+        return df
     
-    def _categorize_volume(self, volume: int) -> str:
-        """Categorize volume for pre-market analysis."""
-        if volume >= 5000000:  # 50L+
-            return "Very High"
-        elif volume >= 1000000:  # 10L+
-            return "High"
-        elif volume >= 500000:  # 5L+
-            return "Medium"
-        else:
-            return "Low"
+    def _categorize_volume(self, volume: np.ndarray) -> np.ndarray:
+        """Categorize a volume column for pre-market analysis."""
+        return VOLUME_CATEGORY_LABELS[np.searchsorted(VOLUME_CATEGORY_CUTS, volume, side='right')]
     
-    def _calculate_premarket_score(self, volume: int, price_change_pct: float, volatility: float) -> float:
+    def _calculate_premarket_score(self, volume: np.ndarray, abs_price_change_pct: np.ndarray,
+                                   volatility: np.ndarray) -> np.ndarray:
         """
-        Calculate a pre-market interest score based on volume, price movement, and volatility.
-        Higher score indicates more interesting for pre-market analysis.
+        Calculate a pre-market interest score based on volume, absolute price movement, and
+        volatility for whole columns at once. Higher score indicates more interesting for
+        pre-market analysis.
         """
         # Normalize volume (0-40 points)
-        volume_score = min(40, (volume / 1000000) * 10)
+        score = np.minimum(40, (volume / 1000000) * 10)
         
         # Price movement score (0-30 points)
-        price_score = min(30, abs(price_change_pct) * 3)
+        score += np.minimum(30, abs_price_change_pct * 3)
         
         # Volatility score (0-30 points)
-        volatility_score = min(30, volatility * 2)
+        score += np.minimum(30, volatility * 2)
         
-        return round(volume_score + price_score + volatility_score, 1)
+        return np.round(score, 1, out=score)
     
     def get_premarket_high_volume_stocks(self, target_date: date = None) -> pd.DataFrame:
         """
@@ -300,35 +491,30 @@ class PreMarketHighVolumeAnalyzer:
         if target_date is None:
             target_date = self.get_last_trading_day()
         
-        # Try Kite API first, fallback to Yahoo Finance
-        if self.kite:
-            df = self.fetch_premarket_data_kite(self.nifty_500_symbols, target_date)
-        else:
-            # Use Kite API only - no yfinance fallback
-            if self.kite:
-                df = self.fetch_premarket_data_kite(self.nifty_500_symbols, target_date)
-            else:
-                st.error("Zerodha API session required for data fetching")
-                return pd.DataFrame()
+        # Use Kite API only - no yfinance fallback
+        if self.kite is None:
+            st.error("Zerodha API session required for data fetching")
+            return pd.DataFrame()
+        
+        df = self.fetch_premarket_data_kite(self.nifty_500_symbols, target_date)
+        for message in df.attrs.get('errors', ()):
+            st.error(message)
         
         if df.empty:
             return df
         
-        # Sort by pre-market score (most interesting first)
-        df = df.sort_values('premarket_score', ascending=False)
-        
-        return df.reset_index(drop=True)
+        # Arrow-backed columns, then sort by pre-market score (most interesting first);
+        # the stable sort keeps focus-list order among equal scores
+        df = df.convert_dtypes(convert_integer=False, dtype_backend='pyarrow')
+        return df.sort_values('premarket_score', ascending=False, kind='stable', ignore_index=True)
     
     def format_volume(self, volume: int) -> str:
         """Format volume in readable format (K, L, Cr)."""
-        if volume >= 10000000:  # 1 Crore
-            return f"{volume/10000000:.1f}Cr"
-        elif volume >= 100000:  # 1 Lakh
-            return f"{volume/100000:.1f}L"
-        elif volume >= 1000:  # 1 Thousand
-            return f"{volume/1000:.1f}K"
-        else:
-            return str(volume)
+        return format_volume(volume)
+    
+    def format_volume_column(self, volumes) -> np.ndarray:
+        """Format a whole volume column like format_volume."""
+        return format_volume_column(volumes)
     
     def get_premarket_insights(self, df: pd.DataFrame) -> Dict:
         """Generate pre-market specific insights from the data."""
@@ -338,15 +524,19 @@ class PreMarketHighVolumeAnalyzer:
         # Top movers by pre-market score
         top_scorer = df.iloc[0]
         
+        # Count over the raw columns rather than materializing a filtered frame per metric
+        volume_category = df['volume_category'].to_numpy()
+        price_change_pct = df['price_change_pct'].to_numpy()
+        
         # Volume analysis
-        very_high_volume = len(df[df['volume_category'] == 'Very High'])
-        high_volume = len(df[df['volume_category'] == 'High'])
+        very_high_volume = int(np.count_nonzero(volume_category == 'Very High'))
+        high_volume = int(np.count_nonzero(volume_category == 'High'))
         
         # Price movement analysis
-        big_movers = len(df[abs(df['price_change_pct']) >= 3])  # 3%+ moves
+        big_movers = int(np.count_nonzero(df['abs_price_change_pct'].to_numpy() >= 3))  # 3%+ moves
         
         # Volatility analysis
-        high_volatility = len(df[df['volatility_pct'] >= 5])  # 5%+ volatility
+        high_volatility = int(np.count_nonzero(df['volatility_pct'].to_numpy() >= 5))  # 5%+ volatility
         
         return {
             'top_premarket_stock': top_scorer['symbol'],
@@ -357,5 +547,5 @@ class PreMarketHighVolumeAnalyzer:
             'high_volatility_count': high_volatility,
             'total_stocks': len(df),
             'avg_volume': df['volume'].mean(),
-            'avg_price_change': df['price_change_pct'].mean()
+            'avg_price_change': price_change_pct.mean()
         }
@@ -18,16 +18,67 @@ import pandas as pd
 import numpy as np
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from collections import OrderedDict
+import logging
+import threading
+import time
 import warnings
-import ta
-from ta.utils import dropna
-from optimized_data_cache import get_single_stock_fast, get_stocks_data_fast
+from numpy.lib.stride_tricks import sliding_window_view
+from technical_indicator_kernels import adx, bollinger_bands, macd, wilder_rsi
 try:
     from kiteconnect import KiteConnect
 except ImportError:
     KiteConnect = None
 warnings.filterwarnings('ignore')
 
+logger = logging.getLogger(__name__)
+
+# KST components as (ROC period, moving-average window, weight)
+KST_COMPONENTS = ((10, 10, 1), (15, 10, 2), (20, 10, 3), (30, 15, 4))
+KST_SIGNAL_WINDOW = 9
+# Closes needed to evaluate the last KST_SIGNAL_WINDOW KST values
+KST_LOOKBACK = max(roc + window for roc, window, _ in KST_COMPONENTS) + KST_SIGNAL_WINDOW - 1
+
+# How long a fetched OHLCV frame is reused: intraday bars move quickly, daily bars do not
+OHLCV_INTRADAY_TTL_SECONDS = 300
+OHLCV_DAILY_TTL_SECONDS = 3600
+OHLCV_CACHE_MAX_ENTRIES = 512
+
+# (SYMBOL, period, interval) -> (monotonic expiry, frame), kept in LRU order (oldest first).
+# Shared by every engine instance, since analyze_stock_for_premarket builds a new one per call.
+_ohlcv_cache: "OrderedDict[Tuple[str, str, str], Tuple[float, pd.DataFrame]]" = OrderedDict()
+# (BENCHMARK, rs period) -> (monotonic expiry, daily closes), reused by every stock in a batch
+_benchmark_cache: "OrderedDict[Tuple[str, int], Tuple[float, pd.Series]]" = OrderedDict()
+_ohlcv_cache_lock = threading.Lock()
+
+def _ohlcv_ttl(interval: str) -> int:
+    """Cache lifetime for bars of ``interval`` (minute/hour bars are intraday)."""
+    return OHLCV_INTRADAY_TTL_SECONDS if interval.endswith(('m', 'h')) else OHLCV_DAILY_TTL_SECONDS
+
+def clear_ohlcv_cache():
+    """Drop every cached OHLCV frame and benchmark series so the next request refetches."""
+    with _ohlcv_cache_lock:
+        _ohlcv_cache.clear()
+        _benchmark_cache.clear()
+
+def _cache_get(cache: OrderedDict, key: Tuple):
+    """Unexpired value for ``key``, or None."""
+    with _ohlcv_cache_lock:
+        entry = cache.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            cache.move_to_end(key)
+            return entry[1]
+    return None
+
+def _cache_put(cache: OrderedDict, key: Tuple, value, ttl: float):
+    """Store ``value`` for ``ttl`` seconds, evicting least recently used entries past the cap."""
+    with _ohlcv_cache_lock:
+        cache[key] = (time.monotonic() + ttl, value)
+        cache.move_to_end(key)
+        while len(cache) > OHLCV_CACHE_MAX_ENTRIES:
+            cache.popitem(last=False)
+
 class PreMarketTechnicalAnalysisEngine:
     """
     Advanced technical analysis engine for pre-market stock analysis.
@@ -37,195 +88,276 @@ class PreMarketTechnicalAnalysisEngine:
     def __init__(self, kite = None):
         self.kite = kite
         
-    def get_ohlcv_data(self, symbol: str, period: str = "1y", interval: str = "1d") -> pd.DataFrame:
-        """Get OHLCV data for a stock using optimized caching."""
+    def get_ohlcv_data(self, symbol: str, period: str = "1y", interval: str = "1d",
+                       refresh: bool = False) -> pd.DataFrame:
+        """
+        Get OHLCV data for a stock. Frames are cached per (symbol, period, interval) for a few
+        minutes (intraday) or an hour (daily) and returned by reference, so callers must not
+        modify them in place; ``refresh=True`` bypasses the cache and refetches.
+        """
+        key = (symbol.upper(), period, interval)
+        if not refresh:
+            data = _cache_get(_ohlcv_cache, key)
+            if data is not None:
+                return data
+        
+        data = self._download_ohlcv(symbol, period, interval)
+        
+        # Failed fetches come back empty and are retried on the next call
+        if not data.empty:
+            _cache_put(_ohlcv_cache, key, data, _ohlcv_ttl(interval))
+        
+        return data
+    
+    def _download_ohlcv(self, symbol: str, period: str, interval: str) -> pd.DataFrame:
+        """Fetch OHLCV history, trying the NSE, BSE and bare ticker forms in turn."""
         try:
-            # Use optimized cache for faster data retrieval
-            result = get_single_stock_fast(symbol)
-            if result['status'] == 'success' and 'data' in result:
-                data = result['data']
-                if not data.empty and len(data) > 20:  # Need sufficient data
-                    print(f"✅ Successfully fetched {len(data)} data points for {symbol} (cached)")
-                    # Clean and validate data
-                    data = data.dropna()
-                    return data
-                else:
-                    print(f"⚠️ Insufficient cached data for {symbol}: {len(data) if not data.empty else 0} points")
-            
-            # Fallback to direct fetch if cache fails
+            # The shared quote cache only keeps the last few closes, so fetch full history directly
             ticker_formats = [f"{symbol}.NS", f"{symbol}.BO", symbol]
             
             for ticker_symbol in ticker_formats:
                 try:
-                    print(f"Fallback: Trying to fetch data for {ticker_symbol}...")
+                    logger.debug("Fetching %s %s/%s", ticker_symbol, period, interval)
                     ticker = yf.Ticker(ticker_symbol)
                     data = ticker.history(period=period, interval=interval)
                     
                     if not data.empty and len(data) > 20:  # Need sufficient data
-                        print(f"✅ Successfully fetched {len(data)} data points for {ticker_symbol}")
+                        logger.debug("Fetched %d data points for %s", len(data), ticker_symbol)
                         # Clean and validate data
                         data = data.dropna()
                         return data
                     else:
-                        print(f"⚠️ Insufficient data for {ticker_symbol}: {len(data) if not data.empty else 0} points")
+                        logger.debug("Insufficient data for %s: %d points", ticker_symbol, len(data))
                         
-                except Exception as e:
-                    print(f"❌ Error with {ticker_symbol}: {str(e)}")
+                except Exception:
+                    logger.debug("Fetch failed for %s", ticker_symbol, exc_info=True)
                     continue
             
-            print(f"❌ All methods failed for {symbol}")
+            logger.warning("No usable OHLCV data for %s (%s/%s)", symbol, period, interval)
             return pd.DataFrame()
             
-        except Exception as e:
-            print(f"❌ Critical error fetching data for {symbol}: {str(e)}")
+        except Exception:
+            logger.exception("Error fetching data for %s", symbol)
             return pd.DataFrame()
     
+    @staticmethod
+    def _rsi_from_close(close: np.ndarray, period: int = 14) -> float:
+        if len(close) < period:
+            return np.nan
+        return round(wilder_rsi(close, period)[-1], 2)
+    
+    @staticmethod
+    def _adx_from_arrays(high: np.ndarray, low: np.ndarray, close: np.ndarray, period: int = 14) -> float:
+        if len(close) < period:
+            return np.nan
+        return round(adx(high, low, close, period)[-1], 2)
+    
+    @staticmethod
+    def _macd_from_close(close: np.ndarray) -> Dict[str, float]:
+        if len(close) < 26:
+            return {'macd': np.nan, 'signal': np.nan, 'histogram': np.nan}
+        
+        line, signal, histogram = macd(close)
+        return {
+            'macd': round(line[-1], 4),
+            'signal': round(signal[-1], 4),
+            'histogram': round(histogram[-1], 4)
+        }
+    
+    @staticmethod
+    def _bollinger_from_close(close: np.ndarray, period: int = 20) -> Dict[str, float]:
+        if len(close) < period:
+            return {'upper': np.nan, 'middle': np.nan, 'lower': np.nan, 'position': np.nan}
+        
+        bb_upper, bb_middle, bb_lower = bollinger_bands(close, period)
+        current_price = close[-1]
+        upper = bb_upper[-1]
+        lower = bb_lower[-1]
+        middle = bb_middle[-1]
+        
+        # Calculate position within bands (0-100%)
+        position = ((current_price - lower) / (upper - lower)) * 100 if upper != lower else 50
+        
+        return {
+            'upper': round(upper, 2),
+            'middle': round(middle, 2),
+            'lower': round(lower, 2),
+            'position': round(position, 1)
+        }
+    
     def calculate_rsi(self, data: pd.DataFrame, period: int = 14) -> float:
         """Calculate RSI (Relative Strength Index)."""
         try:
-            if data.empty or len(data) < period:
+            if data.empty:
                 return np.nan
-            
-            rsi = ta.momentum.RSIIndicator(close=data['Close'], window=period)
-            return round(rsi.rsi().iloc[-1], 2)
+            return self._rsi_from_close(data['Close'].to_numpy(dtype=np.float64), period)
         except:
             return np.nan
     
     def calculate_adx(self, data: pd.DataFrame, period: int = 14) -> float:
         """Calculate ADX (Average Directional Index)."""
         try:
-            if data.empty or len(data) < period:
+            if data.empty:
                 return np.nan
-            
-            adx = ta.trend.ADXIndicator(
-                high=data['High'], 
-                low=data['Low'], 
-                close=data['Close'], 
-                window=period
+            return self._adx_from_arrays(
+                data['High'].to_numpy(dtype=np.float64),
+                data['Low'].to_numpy(dtype=np.float64),
+                data['Close'].to_numpy(dtype=np.float64),
+                period
             )
-            return round(adx.adx().iloc[-1], 2)
         except:
             return np.nan
     
     def calculate_macd(self, data: pd.DataFrame) -> Dict[str, float]:
         """Calculate MACD indicators."""
         try:
-            if data.empty or len(data) < 26:
+            if data.empty:
                 return {'macd': np.nan, 'signal': np.nan, 'histogram': np.nan}
-            
-            macd = ta.trend.MACD(close=data['Close'])
-            return {
-                'macd': round(macd.macd().iloc[-1], 4),
-                'signal': round(macd.macd_signal().iloc[-1], 4),
-                'histogram': round(macd.macd_diff().iloc[-1], 4)
-            }
+            return self._macd_from_close(data['Close'].to_numpy(dtype=np.float64))
         except:
             return {'macd': np.nan, 'signal': np.nan, 'histogram': np.nan}
     
     def calculate_bollinger_bands(self, data: pd.DataFrame, period: int = 20) -> Dict[str, float]:
         """Calculate Bollinger Bands."""
         try:
-            if data.empty or len(data) < period:
+            if data.empty:
                 return {'upper': np.nan, 'middle': np.nan, 'lower': np.nan, 'position': np.nan}
-            
-            bb = ta.volatility.BollingerBands(close=data['Close'], window=period)
-            current_price = data['Close'].iloc[-1]
-            upper = bb.bollinger_hband().iloc[-1]
-            lower = bb.bollinger_lband().iloc[-1]
-            middle = bb.bollinger_mavg().iloc[-1]
-            
-            # Calculate position within bands (0-100%)
-            position = ((current_price - lower) / (upper - lower)) * 100 if upper != lower else 50
-            
-            return {
-                'upper': round(upper, 2),
-                'middle': round(middle, 2),
-                'lower': round(lower, 2),
-                'position': round(position, 1)
-            }
+            return self._bollinger_from_close(data['Close'].to_numpy(dtype=np.float64), period)
         except:
             return {'upper': np.nan, 'middle': np.nan, 'lower': np.nan, 'position': np.nan}
     
+    @staticmethod
+    def _support_resistance_from_arrays(high: np.ndarray, low: np.ndarray) -> Dict[str, float]:
+        if len(low) < 20:
+            return {'support': np.nan, 'resistance': np.nan}
+        
+        # Simple support/resistance based on the last 20 sessions' lows and highs
+        return {
+            'support': round(low[-20:].min(), 2),
+            'resistance': round(high[-20:].max(), 2)
+        }
+    
     def calculate_support_resistance(self, data: pd.DataFrame) -> Dict[str, float]:
         """Calculate basic support and resistance levels."""
         try:
-            if data.empty or len(data) < 20:
+            if data.empty:
                 return {'support': np.nan, 'resistance': np.nan}
-            
-            # Simple support/resistance based on recent highs and lows
-            recent_data = data.tail(20)
-            support = recent_data['Low'].min()
-            resistance = recent_data['High'].max()
-            
-            return {
-                'support': round(support, 2),
-                'resistance': round(resistance, 2)
-            }
+            return self._support_resistance_from_arrays(
+                data['High'].to_numpy(dtype=np.float64),
+                data['Low'].to_numpy(dtype=np.float64)
+            )
         except:
             return {'support': np.nan, 'resistance': np.nan}
     
+    @staticmethod
+    def _kst_from_close(close: np.ndarray) -> Dict[str, float]:
+        if len(close) < 100:  # Need enough data for KST
+            return {'kst': np.nan, 'kst_signal': np.nan, 'kst_histogram': np.nan}
+        
+        # Only the last KST_SIGNAL_WINDOW KST values are consumed (latest value and its signal),
+        # so each ROC moving average is evaluated over the tail of the series only
+        tail = close[-KST_LOOKBACK:]
+        kst = np.zeros(KST_SIGNAL_WINDOW)
+        for roc_period, window, weight in KST_COMPONENTS:
+            roc = (tail[roc_period:] / tail[:-roc_period] - 1) * 100
+            kst += weight * sliding_window_view(roc[-(window + KST_SIGNAL_WINDOW - 1):], window).mean(axis=1)
+        
+        kst_signal = kst.mean()
+        return {
+            'kst': round(kst[-1], 2),
+            'kst_signal': round(kst_signal, 2),
+            'kst_histogram': round(kst[-1] - kst_signal, 2)
+        }
+    
     def calculate_kst(self, data: pd.DataFrame) -> Dict[str, float]:
         """Calculate KST (Know Sure Thing) indicator."""
         try:
-            if data.empty or len(data) < 100:  # Need enough data for KST
+            if data.empty:
                 return {'kst': np.nan, 'kst_signal': np.nan, 'kst_histogram': np.nan}
-            
-            # KST calculation using different ROC periods
-            close = data['Close']
-            
-            # ROC calculations for different periods
-            roc1 = close.pct_change(10) * 100  # 10-period ROC
-            roc2 = close.pct_change(15) * 100  # 15-period ROC
-            roc3 = close.pct_change(20) * 100  # 20-period ROC
-            roc4 = close.pct_change(30) * 100  # 30-period ROC
-            
-            # Moving averages of ROCs
-            ma1 = roc1.rolling(10).mean()
-            ma2 = roc2.rolling(10).mean()
-            ma3 = roc3.rolling(10).mean()
-            ma4 = roc4.rolling(15).mean()
-            
-            # KST calculation with weights
-            kst = (ma1 * 1) + (ma2 * 2) + (ma3 * 3) + (ma4 * 4)
-            kst_signal = kst.rolling(9).mean()  # 9-period signal line
-            kst_histogram = kst - kst_signal
-            
-            return {
-                'kst': round(kst.iloc[-1], 2) if not pd.isna(kst.iloc[-1]) else np.nan,
-                'kst_signal': round(kst_signal.iloc[-1], 2) if not pd.isna(kst_signal.iloc[-1]) else np.nan,
-                'kst_histogram': round(kst_histogram.iloc[-1], 2) if not pd.isna(kst_histogram.iloc[-1]) else np.nan
-            }
+            return self._kst_from_close(data['Close'].to_numpy(dtype=np.float64))
         except Exception as e:
             return {'kst': np.nan, 'kst_signal': np.nan, 'kst_histogram': np.nan}
     
-    def calculate_relative_strength(self, symbol: str, benchmark: str = "^NSEI", period: int = 55) -> Dict[str, float]:
-        """Calculate relative strength vs benchmark (default Nifty)."""
+    def calculate_daily_indicators(self, data: pd.DataFrame) -> Dict:
+        """
+        RSI, ADX, MACD, Bollinger Bands, support/resistance and KST for the daily timeframe,
+        computed from a single extraction of the OHLC arrays. Indicators that come out
+        entirely NaN are left out, as in get_comprehensive_analysis.
+        """
+        high, low, close = data[['High', 'Low', 'Close']].to_numpy(dtype=np.float64).T
+        indicators = {}
+        
+        rsi_val = self._rsi_from_close(close)
+        if not np.isnan(rsi_val):
+            indicators['rsi'] = rsi_val
+        
+        adx_val = self._adx_from_arrays(high, low, close)
+        if not np.isnan(adx_val):
+            indicators['adx'] = adx_val
+        
+        macd_data = self._macd_from_close(close)
+        if not all(np.isnan(list(macd_data.values()))):
+            indicators['macd'] = macd_data
+        
+        bb_data = self._bollinger_from_close(close)
+        if not all(np.isnan([v for v in bb_data.values() if isinstance(v, (int, float))])):
+            indicators['bollinger_bands'] = bb_data
+        
+        sr_data = self._support_resistance_from_arrays(high, low)
+        if not all(np.isnan(list(sr_data.values()))):
+            indicators['support_resistance'] = sr_data
+        
+        kst_data = self._kst_from_close(close)
+        if not all(np.isnan(list(kst_data.values()))):
+            indicators['kst'] = kst_data
+        
+        return indicators
+    
+    def get_benchmark_close(self, benchmark: str = "^NSEI", period: int = 55,
+                            refresh: bool = False) -> pd.Series:
+        """
+        Daily closes of a benchmark index covering a relative strength period. Cached like
+        daily OHLCV frames and shared by every stock; ``refresh=True`` refetches.
+        """
+        key = (benchmark.upper(), period)
+        if not refresh:
+            closes = _cache_get(_benchmark_cache, key)
+            if closes is not None:
+                return closes
+        
         try:
-            # Fetch stock data
-            stock_data = self.get_ohlcv_data(symbol, period=f"{period*2}d", interval="1d")
-            
-            # Fetch benchmark data (Nifty)
-            if benchmark == "^NSEI":
-                benchmark_ticker = "^NSEI"
-            elif benchmark == "^NSEBANK":
-                benchmark_ticker = "^NSEBANK"
-            elif benchmark == "^CNXIT":
-                benchmark_ticker = "^CNXIT"
-            else:
-                benchmark_ticker = benchmark
-            
-            benchmark_data = yf.Ticker(benchmark_ticker).history(period=f"{period*2}d", interval="1d")
+            closes = yf.Ticker(benchmark).history(period=f"{period*2}d", interval="1d")['Close']
+        except Exception:
+            logger.warning("Error fetching benchmark %s", benchmark, exc_info=True)
+            return pd.Series(dtype=float)
+        
+        # Empty results are not cached so the next stock retries the fetch
+        if not closes.empty:
+            _cache_put(_benchmark_cache, key, closes, OHLCV_DAILY_TTL_SECONDS)
+        
+        return closes
+    
+    def calculate_relative_strength(self, stock_data: pd.DataFrame, benchmark: str = "^NSEI", period: int = 55,
+                                    benchmark_series: Optional[pd.Series] = None) -> Dict[str, float]:
+        """
+        Calculate relative strength vs benchmark (default Nifty) from already fetched daily
+        ``stock_data`` covering at least ``period`` sessions.
+        Pass ``benchmark_series`` (from get_benchmark_close) to reuse one benchmark fetch across stocks.
+        """
+        try:
+            # Fetch benchmark data (Nifty) unless the caller already has it
+            benchmark_close = benchmark_series if benchmark_series is not None else self.get_benchmark_close(benchmark, period)
             
-            if stock_data.empty or benchmark_data.empty:
+            if stock_data.empty or benchmark_close.empty:
                 return {'relative_strength': np.nan, 'rs_rank': np.nan, 'outperformance': np.nan}
             
             # Align data by date
-            common_dates = stock_data.index.intersection(benchmark_data.index)
+            common_dates = stock_data.index.intersection(benchmark_close.index)
             if len(common_dates) < period:
                 return {'relative_strength': np.nan, 'rs_rank': np.nan, 'outperformance': np.nan}
             
             stock_aligned = stock_data.loc[common_dates]['Close']
-            benchmark_aligned = benchmark_data.loc[common_dates]['Close']
+            benchmark_aligned = benchmark_close.loc[common_dates]
             
             # Calculate relative strength over the specified period
             if len(stock_aligned) >= period:
@@ -254,7 +386,8 @@ class PreMarketTechnicalAnalysisEngine:
         except Exception as e:
             return {'relative_strength': np.nan, 'rs_rank': np.nan, 'outperformance': np.nan}
     
-    def get_comprehensive_analysis(self, symbol: str, benchmark: str = "^NSEI", rs_period: int = 55) -> Dict:
+    def get_comprehensive_analysis(self, symbol: str, benchmark: str = "^NSEI", rs_period: int = 55,
+                                   benchmark_series: Optional[pd.Series] = None) -> Dict:
         """
         Get comprehensive technical analysis for a stock across multiple timeframes.
         """
@@ -265,70 +398,69 @@ class PreMarketTechnicalAnalysisEngine:
                 'timeframes': {}
             }
 
+            # The daily frame also feeds relative strength, so it must span rs_period sessions;
+            # rs_period*2 calendar days covers that once it exceeds a year
+            daily_period = f"{rs_period * 2}d" if rs_period * 2 > 365 else '1y'
+
             # Define timeframes to analyze - start with daily which is most important
             timeframes = {
-                'daily': {'period': '1y', 'interval': '1d'},  # More data for better calculations
+                'daily': {'period': daily_period, 'interval': '1d'},  # More data for better calculations
                 '30m': {'period': '60d', 'interval': '30m'},
                 '15m': {'period': '30d', 'interval': '15m'},
                 '5m': {'period': '10d', 'interval': '5m'}
             }
 
+            # The downloads are independent network round-trips, so fetch every timeframe
+            # (and the benchmark, unless the caller supplied it) concurrently
+            with ThreadPoolExecutor(max_workers=len(timeframes) + 1) as executor:
+                data_futures = {
+                    tf_name: executor.submit(self.get_ohlcv_data, symbol, tf_config['period'], tf_config['interval'])
+                    for tf_name, tf_config in timeframes.items()
+                }
+                benchmark_future = (
+                    executor.submit(self.get_benchmark_close, benchmark, rs_period)
+                    if benchmark_series is None else None
+                )
+
+            if benchmark_future is not None:
+                benchmark_series = benchmark_future.result()
+
             # Process daily timeframe first as it's most critical
             for tf_name in ['daily', '30m', '15m', '5m']:
                 if tf_name not in timeframes:
                     continue
 
-                tf_config = timeframes[tf_name]
                 try:
-                    # Get OHLCV data for this timeframe
-                    data = self.get_ohlcv_data(symbol, tf_config['period'], tf_config['interval'])
+                    # OHLCV data for this timeframe
+                    data = data_futures[tf_name].result()
 
                     if data.empty or len(data) < 10:
-                        print(f"Insufficient data for {symbol} {tf_name}: {len(data) if not data.empty else 0} points")
+                        logger.debug("Insufficient data for %s %s: %d points", symbol, tf_name, len(data))
                         continue
 
-                    print(f"Processing {symbol} {tf_name}: {len(data)} data points")
+                    logger.debug("Processing %s %s: %d data points", symbol, tf_name, len(data))
 
                     # Calculate indicators for this timeframe
-                    indicators = {}
-
-                    # RSI for all timeframes
-                    rsi_val = self.calculate_rsi(data)
-                    if not np.isnan(rsi_val):
-                        indicators['rsi'] = rsi_val
-
-                    # ADX for daily and 30m only
-                    if tf_name in ['daily', '30m']:
-                        adx_val = self.calculate_adx(data)
-                        if not np.isnan(adx_val):
-                            indicators['adx'] = adx_val
-
-                    # Additional indicators for daily timeframe
                     if tf_name == 'daily':
-                        # MACD
-                        macd_data = self.calculate_macd(data)
-                        if not all(np.isnan(list(macd_data.values()))):
-                            indicators['macd'] = macd_data
-
-                        # Bollinger Bands
-                        bb_data = self.calculate_bollinger_bands(data)
-                        if not all(np.isnan([v for v in bb_data.values() if isinstance(v, (int, float))])):
-                            indicators['bollinger_bands'] = bb_data
-
-                        # Support/Resistance
-                        sr_data = self.calculate_support_resistance(data)
-                        if not all(np.isnan(list(sr_data.values()))):
-                            indicators['support_resistance'] = sr_data
-
-                        # KST
-                        kst_data = self.calculate_kst(data)
-                        if not all(np.isnan(list(kst_data.values()))):
-                            indicators['kst'] = kst_data
+                        indicators = self.calculate_daily_indicators(data)
 
                         # Calculate relative strength
-                        rs_data = self.calculate_relative_strength(symbol, benchmark, rs_period)
+                        rs_data = self.calculate_relative_strength(data, benchmark, rs_period, benchmark_series)
                         if rs_data and not all(np.isnan([v for v in rs_data.values() if isinstance(v, (int, float))])):
                             indicators['relative_strength'] = rs_data
+                    else:
+                        indicators = {}
+
+                        # RSI for all timeframes
+                        rsi_val = self.calculate_rsi(data)
+                        if not np.isnan(rsi_val):
+                            indicators['rsi'] = rsi_val
+
+                        # ADX for daily and 30m only
+                        if tf_name == '30m':
+                            adx_val = self.calculate_adx(data)
+                            if not np.isnan(adx_val):
+                                indicators['adx'] = adx_val
 
                     # OHLCV summary
                     latest = data.iloc[-1]
@@ -347,16 +479,16 @@ class PreMarketTechnicalAnalysisEngine:
                         'data_points': len(data)
                     }
 
-                    print(f"Successfully processed {symbol} {tf_name} with {len(indicators)} indicators")
+                    logger.debug("Processed %s %s with %d indicators", symbol, tf_name, len(indicators))
 
-                except Exception as e:
-                    print(f"Error processing {symbol} {tf_name}: {str(e)}")
+                except Exception:
+                    logger.warning("Error processing %s %s", symbol, tf_name, exc_info=True)
                     continue
 
             return analysis
 
         except Exception as e:
-            print(f"Error in comprehensive analysis for {symbol}: {str(e)}")
+            logger.exception("Error in comprehensive analysis for %s", symbol)
             return {
                 'symbol': symbol,
                 'timestamp': datetime.now().isoformat(),
@@ -364,138 +496,152 @@ class PreMarketTechnicalAnalysisEngine:
                 'error': str(e)
             }
     
-    def generate_trading_decision(self, analysis: Dict) -> Dict[str, str]:
+    @staticmethod
+    def _hold_decision(reason: str) -> Dict:
+        return {
+            'decision': 'HOLD',
+            'confidence': 'Low',
+            'reason': reason,
+            'score': 0
+        }
+    
+    @staticmethod
+    def _decision_inputs(analysis: Dict) -> Optional[Tuple[float, ...]]:
         """
-        Generate automated buy/sell/hold decision with detailed explanation.
+        Indicator values scored by the trading decision, or None when the daily timeframe is
+        missing. Absent indicators are NaN; ``has_macd`` is 1.0 when both MACD lines exist.
         """
-        try:
-            daily_data = analysis['timeframes'].get('daily', {})
-            min30_data = analysis['timeframes'].get('30m', {})
-
-            if 'error' in daily_data or 'indicators' not in daily_data:
-                min30_data = analysis['timeframes'].get('30min', {})
-                
-                if 'error' in daily_data or 'indicators' not in daily_data:
-                    return {
-                        'decision': 'HOLD',
-                        'confidence': 'Low',
-                        'reason': 'Insufficient data for analysis',
-                        'score': 0
-                    }
-            
-            daily_indicators = daily_data['indicators']
-            min30_indicators = min30_data.get('indicators', {}) if '30min' in analysis['timeframes'] else {}
-            
-            # Scoring system
-            bullish_signals = 0
-            bearish_signals = 0
-            reasons = []
-            
-            # RSI Analysis
-            daily_rsi = daily_indicators.get('rsi', np.nan)
-            if not np.isnan(daily_rsi):
-                if daily_rsi < 30:
-                    bullish_signals += 2
-                    reasons.append(f"Daily RSI oversold ({daily_rsi:.1f})")
-                elif daily_rsi > 70:
-                    bearish_signals += 2
-                    reasons.append(f"Daily RSI overbought ({daily_rsi:.1f})")
-                elif 40 <= daily_rsi <= 60:
-                    bullish_signals += 1
-                    reasons.append(f"Daily RSI neutral-bullish ({daily_rsi:.1f})")
-            
-            # ADX Analysis (Trend Strength)
-            daily_adx = daily_indicators.get('adx', np.nan)
-            if not np.isnan(daily_adx):
-                if daily_adx > 25:
-                    reasons.append(f"Strong trend (ADX: {daily_adx:.1f})")
-                    if daily_rsi > 50:
-                        bullish_signals += 1
-                    else:
-                        bearish_signals += 1
-                else:
-                    reasons.append(f"Weak trend (ADX: {daily_adx:.1f})")
-            
-            # MACD Analysis
-            macd_data = daily_indicators.get('macd', {})
-            if macd_data.get('macd') is not None and macd_data.get('signal') is not None:
-                macd_val = macd_data['macd']
-                signal_val = macd_data['signal']
-                
-                if macd_val > signal_val:
-                    bullish_signals += 1
-                    reasons.append("MACD bullish crossover")
-                else:
-                    bearish_signals += 1
-                    reasons.append("MACD bearish crossover")
-            
-            # Bollinger Bands Analysis
-            bb_data = daily_indicators.get('bollinger_bands', {})
-            bb_position = bb_data.get('position', np.nan)
-            if not np.isnan(bb_position):
-                if bb_position < 20:
-                    bullish_signals += 1
-                    reasons.append(f"Near lower Bollinger Band ({bb_position:.1f}%)")
-                elif bb_position > 80:
-                    bearish_signals += 1
-                    reasons.append(f"Near upper Bollinger Band ({bb_position:.1f}%)")
-            
-            # Support/Resistance Analysis
-            sr_data = daily_indicators.get('support_resistance', {})
-            current_price = daily_data['ohlcv']['close']
-            support = sr_data.get('support', np.nan)
-            resistance = sr_data.get('resistance', np.nan)
-            
-            if not np.isnan(support) and not np.isnan(resistance):
-                price_position = (current_price - support) / (resistance - support) * 100
-                if price_position < 25:
-                    bullish_signals += 1
-                    reasons.append(f"Near support level (₹{support:.2f})")
-                elif price_position > 75:
-                    bearish_signals += 1
-                    reasons.append(f"Near resistance level (₹{resistance:.2f})")
-            
-            # 30-min timeframe confirmation
-            if min30_indicators:
-                min30_rsi = min30_indicators.get('rsi', np.nan)
-                if not np.isnan(min30_rsi):
-                    if daily_rsi < 40 and min30_rsi < 40:
-                        bullish_signals += 1
-                        reasons.append("Multi-timeframe oversold confirmation")
-                    elif daily_rsi > 60 and min30_rsi > 60:
-                        bearish_signals += 1
-                        reasons.append("Multi-timeframe overbought confirmation")
-            
-            # Calculate final decision
-            net_score = bullish_signals - bearish_signals
-            total_signals = bullish_signals + bearish_signals
-            
-            if net_score >= 2:
-                decision = "BUY"
-                confidence = "High" if net_score >= 3 else "Medium"
-            elif net_score <= -2:
-                decision = "SELL"
-                confidence = "High" if net_score <= -3 else "Medium"
+        daily_data = analysis['timeframes'].get('daily', {})
+        if 'error' in daily_data or 'indicators' not in daily_data:
+            return None
+        
+        daily_indicators = daily_data['indicators']
+        min30_data = analysis['timeframes'].get('30m', {})
+        min30_indicators = min30_data.get('indicators', {}) if '30min' in analysis['timeframes'] else {}
+        
+        macd_data = daily_indicators.get('macd', {})
+        has_macd = macd_data.get('macd') is not None and macd_data.get('signal') is not None
+        sr_data = daily_indicators.get('support_resistance', {})
+        
+        return (
+            daily_indicators.get('rsi', np.nan),
+            daily_indicators.get('adx', np.nan),
+            float(has_macd),
+            macd_data['macd'] - macd_data['signal'] if has_macd else np.nan,
+            daily_indicators.get('bollinger_bands', {}).get('position', np.nan),
+            daily_data['ohlcv']['close'],
+            sr_data.get('support', np.nan),
+            sr_data.get('resistance', np.nan),
+            min30_indicators.get('rsi', np.nan)
+        )
+    
+    def generate_trading_decisions_batch(self, analyses: List[Dict]) -> List[Dict]:
+        """
+        Generate automated buy/sell/hold decisions with detailed explanations for many
+        analyses at once. The scored indicators are stacked into one matrix and every rule
+        is evaluated as a column mask; only the explanation text is assembled per stock.
+        """
+        results: List[Optional[Dict]] = [None] * len(analyses)
+        rows, row_inputs = [], []
+        
+        for i, analysis in enumerate(analyses):
+            try:
+                inputs = self._decision_inputs(analysis)
+            except Exception as e:
+                results[i] = self._hold_decision(f'Analysis error: {str(e)}')
+                continue
+            
+            if inputs is None:
+                results[i] = self._hold_decision('Insufficient data for analysis')
             else:
-                decision = "HOLD"
-                confidence = "Medium" if total_signals >= 3 else "Low"
+                rows.append(i)
+                row_inputs.append(inputs)
+        
+        if not rows:
+            return results
+        
+        try:
+            (rsi, adx_val, has_macd, macd_diff, bb_position,
+             close, support, resistance, rsi_30m) = np.array(row_inputs, dtype=np.float64).T
+            
+            # A flat or inverted support/resistance range has no meaningful position
+            with np.errstate(divide='ignore', invalid='ignore'):
+                price_position = np.where(resistance > support,
+                                          (close - support) / (resistance - support) * 100, np.nan)
+            
+            # NaN compares False, so a missing indicator never fires a rule
+            rsi_oversold = rsi < 30
+            rsi_overbought = rsi > 70
+            rsi_neutral = (rsi >= 40) & (rsi <= 60)
+            strong_trend = adx_val > 25
+            weak_trend = adx_val <= 25
+            trend_up = strong_trend & (rsi > 50)
+            trend_down = strong_trend & ~(rsi > 50)
+            macd_bullish = (has_macd == 1) & (macd_diff > 0)
+            macd_bearish = (has_macd == 1) & ~(macd_diff > 0)
+            near_lower_band = bb_position < 20
+            near_upper_band = bb_position > 80
+            near_support = price_position < 25
+            near_resistance = price_position > 75
+            mtf_oversold = (rsi < 40) & (rsi_30m < 40)
+            mtf_overbought = ~mtf_oversold & (rsi > 60) & (rsi_30m > 60)
+            
+            # RSI extremes count double; every other rule adds one signal
+            bullish = 2 * rsi_oversold + np.column_stack((
+                rsi_neutral, trend_up, macd_bullish, near_lower_band, near_support, mtf_oversold
+            )).sum(axis=1)
+            bearish = 2 * rsi_overbought + np.column_stack((
+                trend_down, macd_bearish, near_upper_band, near_resistance, mtf_overbought
+            )).sum(axis=1)
+            net_score = bullish - bearish
+            total_signals = bullish + bearish
+            
+            decision = np.select([net_score >= 2, net_score <= -2], ['BUY', 'SELL'], 'HOLD')
+            confidence = np.select(
+                [net_score >= 3, net_score >= 2, net_score <= -3, net_score <= -2, total_signals >= 3],
+                ['High', 'Medium', 'High', 'Medium', 'Medium'],
+                'Low'
+            )
             
-            return {
-                'decision': decision,
-                'confidence': confidence,
-                'reason': '; '.join(reasons) if reasons else 'Neutral technical indicators',
-                'score': net_score,
-                'bullish_signals': bullish_signals,
-                'bearish_signals': bearish_signals
-            }
+            # Explanations in rule order: RSI, trend strength, MACD, Bollinger, support/resistance, 30-min
+            reason_rules = (
+                (rsi_oversold, lambda j: f"Daily RSI oversold ({rsi[j]:.1f})"),
+                (rsi_overbought, lambda j: f"Daily RSI overbought ({rsi[j]:.1f})"),
+                (rsi_neutral, lambda j: f"Daily RSI neutral-bullish ({rsi[j]:.1f})"),
+                (strong_trend, lambda j: f"Strong trend (ADX: {adx_val[j]:.1f})"),
+                (weak_trend, lambda j: f"Weak trend (ADX: {adx_val[j]:.1f})"),
+                (macd_bullish, lambda j: "MACD bullish crossover"),
+                (macd_bearish, lambda j: "MACD bearish crossover"),
+                (near_lower_band, lambda j: f"Near lower Bollinger Band ({bb_position[j]:.1f}%)"),
+                (near_upper_band, lambda j: f"Near upper Bollinger Band ({bb_position[j]:.1f}%)"),
+                (near_support, lambda j: f"Near support level (₹{support[j]:.2f})"),
+                (near_resistance, lambda j: f"Near resistance level (₹{resistance[j]:.2f})"),
+                (mtf_oversold, lambda j: "Multi-timeframe oversold confirmation"),
+                (mtf_overbought, lambda j: "Multi-timeframe overbought confirmation"),
+            )
             
+            for j, i in enumerate(rows):
+                reasons = [describe(j) for fired, describe in reason_rules if fired[j]]
+                results[i] = {
+                    'decision': str(decision[j]),
+                    'confidence': str(confidence[j]),
+                    'reason': '; '.join(reasons) if reasons else 'Neutral technical indicators',
+                    'score': int(net_score[j]),
+                    'bullish_signals': int(bullish[j]),
+                    'bearish_signals': int(bearish[j])
+                }
+        
         except Exception as e:
-            return {
-                'decision': 'HOLD',
-                'confidence': 'Low',
-                'reason': f'Analysis error: {str(e)}',
-                'score': 0
-            }
+            for i in rows:
+                results[i] = self._hold_decision(f'Analysis error: {str(e)}')
+        
+        return results
+    
+    def generate_trading_decision(self, analysis: Dict) -> Dict[str, str]:
+        """
+        Generate automated buy/sell/hold decision with detailed explanation.
+        """
+        return self.generate_trading_decisions_batch([analysis])[0]
     
     def get_tradingview_link(self, symbol: str) -> str:
         """Generate TradingView link for the stock."""
@@ -542,17 +688,19 @@ class PreMarketTechnicalAnalysisEngine:
             return {'summary': f'Summary error: {str(e)}'}
 
 def analyze_stock_for_premarket(symbol: str, kite: Optional[KiteConnect] = None, 
-                               benchmark: str = "^NSEI", rs_period: int = 55) -> Dict:
+                               benchmark: str = "^NSEI", rs_period: int = 55,
+                               benchmark_series: Optional[pd.Series] = None,
+                               include_decision: bool = True) -> Dict:
     """
     Comprehensive pre-market technical analysis for a single stock.
+    ``benchmark_series`` lets batch callers share one prefetched benchmark close series.
+    With ``include_decision=False`` the 'decision' key is left out, so batch callers can
+    score every stock in one generate_trading_decisions_batch call.
     """
     engine = PreMarketTechnicalAnalysisEngine(kite)
     
     # Get comprehensive analysis with custom benchmark and period
-    analysis = engine.get_comprehensive_analysis(symbol, benchmark, rs_period)
-    
-    # Generate trading decision
-    decision = engine.generate_trading_decision(analysis)
+    analysis = engine.get_comprehensive_analysis(symbol, benchmark, rs_period, benchmark_series)
     
     # Get TradingView link
     tradingview_link = engine.get_tradingview_link(symbol)
@@ -560,11 +708,16 @@ def analyze_stock_for_premarket(symbol: str, kite: Optional[KiteConnect] = None,
     # Format summary
     summary = engine.format_technical_summary(analysis)
     
-    return {
+    result = {
         'symbol': symbol,
         'analysis': analysis,
-        'decision': decision,
         'tradingview_link': tradingview_link,
         'summary': summary,
         'timestamp': datetime.now().strftime('%Y-%m-%d %H:%M:%S')
     }
+    
+    # Generate trading decision
+    if include_decision:
+        result['decision'] = engine.generate_trading_decision(analysis)
+    
+    return result
@@ -0,0 +1,150 @@
+"""
+Technical Indicator Kernels
+===========================
+Array-level implementations of rolling indicators used by the dashboards.
+They operate on plain NumPy arrays and produce the same values as the
+corresponding `ta` indicators without pandas rolling/ewm overhead.
+"""
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
+from typing import Tuple
+
+
+def rolling_mean_std(values: np.ndarray, window: int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Rolling mean and population standard deviation over ``window`` samples.
+    The first ``window - 1`` positions are NaN, matching pandas/ta.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    mean = np.full(values.shape, np.nan)
+    std = np.full(values.shape, np.nan)
+
+    if len(values) < window:
+        return mean, std
+
+    windows = sliding_window_view(values, window)
+    mean[window - 1:] = windows.mean(axis=1)
+    std[window - 1:] = windows.std(axis=1)
+
+    return mean, std
+
+
+def bollinger_bands(close: np.ndarray, window: int = 20,
+                    window_dev: float = 2.0) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Bollinger Bands as (upper, middle, lower) arrays."""
+    mid, sd = rolling_mean_std(close, window)
+    return mid + window_dev * sd, mid, mid - window_dev * sd
+
+
+def wilder_smooth(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Wilder's smoothing ``avg_t = (avg_{t-1} * (n - 1) + x_t) / n`` seeded with the
+    first sample, evaluated as a single IIR filter pass.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    if len(values) == 0:
+        return values
+
+    alpha = 1.0 / window
+    return lfilter([alpha], [1.0, alpha - 1.0], values, zi=[(1.0 - alpha) * values[0]])[0]
+
+
+def wilder_rsi(close: np.ndarray, window: int = 14) -> np.ndarray:
+    """Relative Strength Index using Wilder's smoothing; first ``window - 1`` values are NaN."""
+    close = np.asarray(close, dtype=np.float64)
+    rsi = np.full(close.shape, np.nan)
+
+    if len(close) < window:
+        return rsi
+
+    diff = np.diff(close, prepend=close[0])
+    avg_gain = wilder_smooth(np.clip(diff, 0.0, None), window)
+    avg_loss = wilder_smooth(np.clip(-diff, 0.0, None), window)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        values = np.where(avg_loss == 0, 100.0, 100.0 - 100.0 / (1.0 + avg_gain / avg_loss))
+    rsi[window - 1:] = values[window - 1:]
+
+    return rsi
+
+
+def ema(values: np.ndarray, span: int) -> np.ndarray:
+    """
+    Exponential moving average matching pandas ``ewm(span=span, adjust=False)`` seeded with
+    the first sample; the first ``span - 1`` values are NaN.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    out = np.full(values.shape, np.nan)
+
+    if len(values) < span:
+        return out
+
+    alpha = 2.0 / (span + 1)
+    smoothed = lfilter([alpha], [1.0, alpha - 1.0], values, zi=[(1.0 - alpha) * values[0]])[0]
+    out[span - 1:] = smoothed[span - 1:]
+
+    return out
+
+
+def macd(close: np.ndarray, window_fast: int = 12, window_slow: int = 26,
+         window_sign: int = 9) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """MACD line, signal line and histogram, as computed by ``ta.trend.MACD``."""
+    line = ema(close, window_fast) - ema(close, window_slow)
+    signal = np.full(line.shape, np.nan)
+
+    if len(line) >= window_slow:
+        signal[window_slow - 1:] = ema(line[window_slow - 1:], window_sign)
+
+    return line, signal, line - signal
+
+
+def _directional_sum(values: np.ndarray, window: int) -> np.ndarray:
+    """
+    Wilder running sum ``s_i = s_{i-1} * (1 - 1/n) + x_{n+i}`` seeded with the sum of the
+    first ``window`` valid samples (``values[1:window + 1]``).
+    """
+    decay = 1.0 - 1.0 / window
+    seed = values[1:window + 1].sum()
+    rest = lfilter([1.0], [1.0, -decay], values[window + 1:], zi=[decay * seed])[0]
+    return np.concatenate(([seed], rest))
+
+
+def adx(high: np.ndarray, low: np.ndarray, close: np.ndarray, window: int = 14) -> np.ndarray:
+    """
+    Average Directional Index with the same smoothing as ``ta.trend.ADXIndicator``.
+    The first ``2 * window - 1`` values, where ta pads with zeros, are NaN.
+    """
+    high = np.asarray(high, dtype=np.float64)
+    low = np.asarray(low, dtype=np.float64)
+    close = np.asarray(close, dtype=np.float64)
+    out = np.full(close.shape, np.nan)
+
+    if len(close) <= 2 * window - 1:
+        return out
+
+    prev_close = close[:-1]
+    true_range = np.empty_like(close)
+    true_range[0] = np.nan
+    true_range[1:] = np.maximum(high[1:], prev_close) - np.minimum(low[1:], prev_close)
+
+    diff_up = np.diff(high, prepend=np.nan)
+    diff_down = np.concatenate(([np.nan], low[:-1] - low[1:]))
+    plus_dm = np.where((diff_up > diff_down) & (diff_up > 0), diff_up, 0.0)
+    minus_dm = np.where((diff_down > diff_up) & (diff_down > 0), diff_down, 0.0)
+
+    trs = _directional_sum(true_range, window)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        plus_di = np.where(trs != 0, 100 * _directional_sum(plus_dm, window) / trs, 0.0)
+        minus_di = np.where(trs != 0, 100 * _directional_sum(minus_dm, window) / trs, 0.0)
+        di_sum = plus_di + minus_di
+        dx = np.where(di_sum != 0, 100 * np.abs((plus_di - minus_di) / di_sum), 0.0)
+
+    # ta averages the first ``window`` DX values, then smooths DX[i - 1] into ADX[i]
+    decay = (window - 1) / window
+    first = dx[:window].mean()
+    rest = lfilter([1.0 / window], [1.0, -decay], dx[window:], zi=[decay * first])[0]
+    out[2 * window - 1:] = np.concatenate(([first], rest))
+
+    return out